@@ -25,14 +25,17 @@
     
     // Data Sources
     const LOCATIONS_FILE = 'data/locations.json';
+    const LOCATIONS_LOG_FILE = 'data/locations.log.jsonl'; // Append-only tail, folded into LOCATIONS_FILE by scripts/locations_log.py
     const USER_METAS_FILE = 'data/metas.json';
     const SYSTEM_METAS_FILE = 'data/plonkit_data.json';
     
     const getRawLocationsUrl = () => `https://raw.githubusercontent.com/${REPO_OWNER}/${REPO_NAME}/main_v2/${LOCATIONS_FILE}?t=${Date.now()}`;
+    const getRawLocationsLogUrl = () => `https://raw.githubusercontent.com/${REPO_OWNER}/${REPO_NAME}/main_v2/${LOCATIONS_LOG_FILE}?t=${Date.now()}`;
     const getRawUserMetasUrl = () => `https://raw.githubusercontent.com/${REPO_OWNER}/${REPO_NAME}/main_v2/${USER_METAS_FILE}?t=${Date.now()}`;
     const getRawSystemMetasUrl = () => `https://raw.githubusercontent.com/${REPO_OWNER}/${REPO_NAME}/main_v2/${SYSTEM_METAS_FILE}?t=${Date.now()}`;
     
     const API_LOCATIONS_URL = `https://api.github.com/repos/${REPO_OWNER}/${REPO_NAME}/contents/${LOCATIONS_FILE}`;
+    const API_LOCATIONS_LOG_URL = `https://api.github.com/repos/${REPO_OWNER}/${REPO_NAME}/contents/${LOCATIONS_LOG_FILE}`;
     const API_USER_METAS_URL = `https://api.github.com/repos/${REPO_OWNER}/${REPO_NAME}/contents/${USER_METAS_FILE}`;
     const API_METAS_URL = `https://api.github.com/repos/${REPO_OWNER}/${REPO_NAME}/contents/${USER_METAS_FILE}`; // Alias for reset
     
@@ -1328,6 +1331,69 @@
         }
     }
 
+    const LOCATION_FIELDS = ['lat', 'lng', 'country', 'nominatimCountry', 'region', 'city', 'road'];
+
+    /**
+     * Folds one locations log entry into a location map (same rules as scripts/locations_log.py).
+     * Meta ids are unioned in order, provided location fields overwrite stored ones.
+     */
+    function applyLocationLogEntry(map, entry) {
+        if (!entry || !entry.panoid) return;
+        let target = map[entry.panoid];
+        if (!target || Array.isArray(target)) {
+            target = { metas: Array.isArray(target) ? target.slice() : [] };
+            map[entry.panoid] = target;
+        }
+        if (!target.metas) target.metas = [];
+        (entry.metas || []).forEach(id => {
+            if (id && !target.metas.includes(id)) target.metas.push(id);
+        });
+        LOCATION_FIELDS.forEach(field => {
+            if (entry[field] !== undefined && entry[field] !== null && entry[field] !== '') {
+                target[field] = entry[field];
+            }
+        });
+    }
+
+    const LOCATION_LOG_MAX_ATTEMPTS = 4;
+
+    /**
+     * Appends a single entry to the locations log instead of rewriting locations.json.
+     * Only the uncompacted tail is transferred, so each contribution stays small.
+     * The PUT is guarded by the file sha; if someone else appended in between
+     * (409), the log is fetched again and the append retried.
+     */
+    async function appendLocationLog(ghAPI, entry, message) {
+        for (let attempt = 1; ; attempt++) {
+            let sha = null;
+            let content = '';
+            try {
+                const data = await ghAPI(API_LOCATIONS_LOG_URL);
+                // Files over 1 MB come without inline content; never overwrite them with a single line
+                if (typeof data.content !== 'string' || data.encoding === 'none') {
+                    throw new Error(`${LOCATIONS_LOG_FILE} is too large for the contents API, run scripts/locations_log.py compact`);
+                }
+                sha = data.sha;
+                content = decodeURIComponent(escape(window.atob(data.content.replace(/\n/g, ""))));
+            } catch (e) {
+                if (!String(e.message).includes('404')) throw e; // Log not created yet
+            }
+            if (content && !content.endsWith('\n')) content += '\n';
+            content += JSON.stringify(entry) + '\n';
+
+            const body = { message, content: window.btoa(unescape(encodeURIComponent(content))) };
+            if (sha) body.sha = sha;
+            try {
+                return await ghAPI(API_LOCATIONS_LOG_URL, 'PUT', body);
+            } catch (e) {
+                // 409: the log changed since we read it; 422 without sha: it was just created
+                const conflict = String(e.message).includes('409') || (!sha && String(e.message).includes('422'));
+                if (!conflict || attempt >= LOCATION_LOG_MAX_ATTEMPTS) throw e;
+                await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+            }
+        }
+    }
+
     async function linkMultipleMetas(metaIds) {
         const panoid = currentPanoid;
         if (!panoid || panoid === "YOUR_PANOID_HERE") {
@@ -1395,44 +1461,16 @@
                 });
             };
 
-            const data = await ghAPI(API_LOCATIONS_URL);
-            let locations = JSON.parse(decodeURIComponent(escape(window.atob(data.content.replace(/\n/g, "")))));
-
-            if (!locations[panoid]) {
-                locations[panoid] = {
-                    metas: [],
-                    lat: currentLocationData.lat,
-                    lng: currentLocationData.lng,
-                    country: currentLocationData.country,
-                    nominatimCountry: currentLocationData.nominatimCountry,
-                    region: currentLocationData.region,
-                    road: currentLocationData.road
-                };
-            } else if (Array.isArray(locations[panoid])) {
-                const oldMetas = locations[panoid];
-                locations[panoid] = {
-                    metas: oldMetas,
-                    lat: currentLocationData.lat,
-                    lng: currentLocationData.lng,
-                    country: currentLocationData.country,
-                    nominatimCountry: currentLocationData.nominatimCountry,
-                    region: currentLocationData.region,
-                    road: currentLocationData.road
-                };
-            }
-            
-            metaIds.forEach(id => {
-                if (!locations[panoid].metas.includes(id)) {
-                    locations[panoid].metas.push(id);
-                }
-            });
-
-            const contentBase64 = window.btoa(unescape(encodeURIComponent(JSON.stringify(locations, null, 2))));
-            await ghAPI(API_LOCATIONS_URL, 'PUT', { 
-                message: `Link ${metaIds.length} metas to ${panoid} via BetterMetas`, 
-                content: contentBase64, 
-                sha: data.sha 
-            });
+            await appendLocationLog(ghAPI, {
+                panoid: panoid,
+                metas: metaIds,
+                lat: currentLocationData.lat,
+                lng: currentLocationData.lng,
+                country: currentLocationData.country,
+                nominatimCountry: currentLocationData.nominatimCountry,
+                region: currentLocationData.region,
+                road: currentLocationData.road
+            }, `Link ${metaIds.length} metas to ${panoid} via BetterMetas`);
 
             updateStatus('Linked!');
             selectedMetaIds.clear();
@@ -1570,51 +1608,29 @@
                 return await ghAPI(apiUrl, 'PUT', { message, content: contentBase64, sha });
             };
 
-            // 1. Fetch both files
+            // 1. Fetch metas.json
             updateStatus('Fetching metas.json...');
             const metasFile = await getFile(API_USER_METAS_URL);
-            
-            updateStatus('Fetching locations.json...');
-            const locsFile = await getFile(API_LOCATIONS_URL);
 
             // 2. Add meta to metas.json
             metasFile.content.push(newMeta);
 
-            // 3. Link panoid in locations.json
-            if (!locsFile.content[panoid]) {
-                locsFile.content[panoid] = {
-                    metas: [],
-                    lat: currentLocationData.lat,
-                    lng: currentLocationData.lng,
-                    country: currentLocationData.country,
-                    region: currentLocationData.region,
-                    city: currentLocationData.city,
-                    road: currentLocationData.road
-                };
-            } else if (Array.isArray(locsFile.content[panoid])) {
-                 const oldMetas = locsFile.content[panoid];
-                 locsFile.content[panoid] = {
-                    metas: oldMetas,
-                    lat: currentLocationData.lat,
-                    lng: currentLocationData.lng,
-                    country: currentLocationData.country,
-                    region: currentLocationData.region,
-                    city: currentLocationData.city,
-                    road: currentLocationData.road
-                };
-            }
-
-            if (!locsFile.content[panoid].metas.includes(newMeta.id)) {
-                locsFile.content[panoid].metas.push(newMeta.id);
-            }
-
-            // 4. Commit metas.json
+            // 3. Commit metas.json
             updateStatus('Saving metas.json...');
             await putFile(API_USER_METAS_URL, metasFile.sha, metasFile.content, `Add meta ${newMeta.id} via BetterMetas`);
 
-            // 5. Commit locations.json
-            updateStatus('Saving locations.json...');
-            await putFile(API_LOCATIONS_URL, locsFile.sha, locsFile.content, `Link ${panoid} to ${newMeta.id} via BetterMetas`);
+            // 4. Link panoid via the locations log
+            updateStatus('Saving location link...');
+            await appendLocationLog(ghAPI, {
+                panoid: panoid,
+                metas: [newMeta.id],
+                lat: currentLocationData.lat,
+                lng: currentLocationData.lng,
+                country: currentLocationData.country,
+                region: currentLocationData.region,
+                city: currentLocationData.city,
+                road: currentLocationData.road
+            }, `Link ${panoid} to ${newMeta.id} via BetterMetas`);
 
             updateStatus('Saved!');
             btn.innerHTML = 'Saved!';
@@ -1694,10 +1710,14 @@
             // 1. Get SHAs
             const metasSha = await getSha(API_METAS_URL);
             const locsSha = await getSha(API_LOCATIONS_URL);
+            const logSha = await getSha(API_LOCATIONS_LOG_URL);
 
             // 2. Overwrite with empty
             await putFile(API_METAS_URL, metasSha, [], "Reset Database (Metas)");
             await putFile(API_LOCATIONS_URL, locsSha, {}, "Reset Database (Locations)");
+            if (logSha) {
+                await ghAPI(API_LOCATIONS_LOG_URL, 'PUT', { message: "Reset Database (Locations Log)", content: '', sha: logSha });
+            }
 
             alert("Database Cleared!");
             location.reload();
@@ -2390,11 +2410,13 @@
         updateStatus('Loading DB...');
 
         let locLoaded = false;
+        let locLogLoaded = false;
         let userMetasLoaded = false;
         let systemMetasLoaded = false;
 
         let tempUserMetas = [];
         let tempSystemMetas = [];
+        let tempLocationLog = [];
 
         // Fetch Locations Map
         GM_xmlhttpRequest({
@@ -2422,6 +2444,34 @@
             }
         });
 
+        // Fetch uncompacted Locations Log (overlaid onto the map once everything is loaded)
+        GM_xmlhttpRequest({
+            method: "GET",
+            url: getRawLocationsLogUrl(),
+            onload: function(response) {
+                if (response.status === 200) {
+                    response.responseText.split('\n').forEach(line => {
+                        if (!line.trim()) return;
+                        try {
+                            tempLocationLog.push(JSON.parse(line));
+                        } catch (e) {
+                            console.warn('[BetterMetas] Skipping malformed locations log line:', line);
+                        }
+                    });
+                    console.log(`[BetterMetas] Loaded ${tempLocationLog.length} location log entries.`);
+                } else {
+                    console.log('[BetterMetas] Locations log empty or 404, proceeding...');
+                }
+                locLogLoaded = true;
+                checkAllLoaded();
+            },
+            onerror: function() {
+                console.warn('[BetterMetas] Locations log request failed, proceeding without it.');
+                locLogLoaded = true;
+                checkAllLoaded();
+            }
+        });
+
         // Fetch User Metas Collection
         GM_xmlhttpRequest({
             method: "GET",
@@ -2474,7 +2524,9 @@
         });
 
         function checkAllLoaded() {
-            if (locLoaded && userMetasLoaded && systemMetasLoaded) {
+            if (locLoaded && locLogLoaded && userMetasLoaded && systemMetasLoaded) {
+                tempLocationLog.forEach(entry => applyLocationLogEntry(locationMap, entry));
+
                 const combined = [...tempUserMetas, ...tempSystemMetas];
                 const seen = new Set();
                 metasData = combined.filter(m => {
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Assign country and region to locations offline from admin-1 boundaries.
+
+Loads a local GeoJSON file of admin-1 polygons (e.g. Natural Earth
+"admin 1 states provinces"), packs their bounding boxes into an STR-tree
+and joins all points of locations.json against it in one pass: each tree
+node filters the points inside its box with NumPy masks, and leaves run a
+vectorized even-odd ray-casting test against the polygon rings.
+
+    python scripts/assign_regions.py admin1.geojson
+    python scripts/assign_regions.py admin1.geojson --fill-missing
+
+Prints entries whose stored `region` or `country` disagrees with the
+assigned one and writes data/region_assignments.json. GeoJSON country
+names are mapped to the names Nominatim returns and then through
+normalizeCountry() (see build_country_tables.py) before comparing, so
+"United States of America" and "United States" agree. --fill-missing
+fills empty `region` fields in locations.json; countries are left to
+the geocoders, since their names are what the userscript matches on.
+RegionIndex.lookup(lat, lng) can be reused for arbitrary coordinates.
+Requires NumPy (pip install numpy).
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from atomic_write import write_json_atomic
+from build_country_tables import is_fuzzy_name_match, normalize_country
+from locations_log import LOCATIONS_FILE_PATH, load_locations
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+ASSIGNMENTS_FILE_PATH = DATA_DIR / "region_assignments.json"
+
+NODE_CAPACITY = 16
+MAX_CELLS = 2_000_000  # points x edges per ray-casting chunk
+
+# Natural Earth admin names -> the English names Nominatim returns
+GEOJSON_COUNTRY_NAMES = {
+    "United States of America": "United States",
+    "United States Virgin Islands": "Virgin Islands, U.S.",
+    "United Republic of Tanzania": "Tanzania",
+    "Republic of Serbia": "Serbia",
+    "Czech Republic": "Czechia",
+    "Macedonia": "North Macedonia",
+    "eSwatini": "Eswatini",
+    "Swaziland": "Eswatini",
+    "The Bahamas": "Bahamas",
+    "Hong Kong S.A.R.": "Hong Kong",
+    "Macao S.A.R": "Macau",
+    "Guinea Bissau": "Guinea-Bissau",
+    "East Timor": "Timor-Leste",
+    "Ivory Coast": "Côte d'Ivoire",
+    "Federated States of Micronesia": "Micronesia",
+    "Curaçao": "Curacao",
+    "Sao Tome and Principe": "São Tomé and Príncipe",
+    "Aland": "Åland Islands",
+    "South Georgia and the Islands": "South Georgia and the South Sandwich Islands",
+}
+
+
+def geojson_country(name, lat, lng) -> str:
+    """GeoJSON country name as the userscript would see it (normalizeCountry applied)."""
+    if not name:
+        return None
+    return normalize_country(GEOJSON_COUNTRY_NAMES.get(name, name), lat, lng)
+
+
+class _Node:
+    __slots__ = ("box", "children", "item")
+
+    def __init__(self, box, children=None, item=None):
+        self.box = box  # (min_x, min_y, max_x, max_y)
+        self.children = children
+        self.item = item
+
+
+def _union(boxes):
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def pack_str_tree(items: list) -> _Node:
+    """Sort-Tile-Recursive bulk load of (box, item) pairs."""
+    level = [_Node(box, item=item) for box, item in items]
+    if not level:
+        return None
+    while len(level) > 1:
+        n_nodes = math.ceil(len(level) / NODE_CAPACITY)
+        n_slices = math.ceil(math.sqrt(n_nodes))
+        per_slice = n_slices * NODE_CAPACITY
+        level.sort(key=lambda n: n.box[0] + n.box[2])
+        parents = []
+        for s in range(0, len(level), per_slice):
+            vertical = sorted(level[s:s + per_slice], key=lambda n: n.box[1] + n.box[3])
+            for g in range(0, len(vertical), NODE_CAPACITY):
+                group = vertical[g:g + NODE_CAPACITY]
+                parents.append(_Node(_union([n.box for n in group]), children=group))
+        level = parents
+    return level[0]
+
+
+def points_in_rings(xs, ys, rings: list):
+    """Even-odd ray casting of points against all rings of one polygon (holes included)."""
+    edges = []
+    for ring in rings:
+        arr = np.asarray(ring, dtype=np.float64)
+        edges.append(np.column_stack([arr, np.roll(arr, -1, axis=0)]))
+    e = np.concatenate(edges)
+    x1, y1, x2, y2 = e[:, 0], e[:, 1], e[:, 2], e[:, 3]
+    # Horizontal edges never cross the ray; avoid dividing by zero
+    dy = np.where(y2 == y1, 1e-300, y2 - y1)
+
+    inside = np.zeros(len(xs), dtype=bool)
+    chunk = max(1, MAX_CELLS // len(e))
+    with np.errstate(over='ignore', invalid='ignore'):
+        for s in range(0, len(xs), chunk):
+            px = xs[s:s + chunk, None]
+            py = ys[s:s + chunk, None]
+            straddles = (y1 > py) != (y2 > py)
+            x_cross = x1 + (py - y1) * (x2 - x1) / dy
+            inside[s:s + chunk] = np.count_nonzero(straddles & (px < x_cross), axis=1) % 2 == 1
+    return inside
+
+
+class RegionIndex:
+    """STR-tree over admin-1 polygons with batched point lookups."""
+
+    def __init__(self, geojson_path: Path, country_key: str = "admin", region_key: str = "name"):
+        with open(geojson_path, 'r', encoding='utf-8') as f:
+            features = json.load(f).get('features', [])
+        self.labels = []   # feature index -> (country, region)
+        self.polygons = []  # item index -> (feature index, rings)
+        items = []
+        for props, geometry in ((f.get('properties') or {}, f.get('geometry') or {}) for f in features):
+            if geometry.get('type') == 'Polygon':
+                parts = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiPolygon':
+                parts = geometry['coordinates']
+            else:
+                continue
+            feature_idx = len(self.labels)
+            self.labels.append((props.get(country_key), props.get(region_key)))
+            for rings in parts:
+                if not rings or not rings[0]:
+                    continue
+                outer = np.asarray(rings[0], dtype=np.float64)
+                box = (outer[:, 0].min(), outer[:, 1].min(), outer[:, 0].max(), outer[:, 1].max())
+                items.append((tuple(float(v) for v in box), len(self.polygons)))
+                self.polygons.append((feature_idx, [np.asarray(r, dtype=np.float64)[:, :2] for r in rings]))
+        self.root = pack_str_tree(items)
+
+    def assign(self, lats, lngs):
+        """Feature index per point (-1 if outside all polygons)."""
+        xs = np.asarray(lngs, dtype=np.float64)
+        ys = np.asarray(lats, dtype=np.float64)
+        result = np.full(len(xs), -1, dtype=np.int64)
+        if self.root is None:
+            return result
+        stack = [(self.root, np.arange(len(xs)))]
+        while stack:
+            node, idx = stack.pop()
+            bx0, by0, bx1, by1 = node.box
+            px, py = xs[idx], ys[idx]
+            idx = idx[(px >= bx0) & (px <= bx1) & (py >= by0) & (py <= by1)]
+            if len(idx) == 0:
+                continue
+            if node.children is not None:
+                stack.extend((child, idx) for child in node.children)
+                continue
+            feature_idx, rings = self.polygons[node.item]
+            # Unassigned points or points claimed by a later feature (first feature wins)
+            idx = idx[(result[idx] == -1) | (result[idx] > feature_idx)]
+            if len(idx):
+                hit = points_in_rings(xs[idx], ys[idx], rings)
+                result[idx[hit]] = feature_idx
+        return result
+
+    def lookup(self, lat: float, lng: float):
+        """(country, region) at a coordinate, or (None, None)."""
+        idx = self.assign([lat], [lng])[0]
+        return self.labels[idx] if idx >= 0 else (None, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Assign country/region to locations from admin-1 polygons.")
+    parser.add_argument("geojson", type=Path, help="admin-1 boundaries as GeoJSON")
+    parser.add_argument("--country-key", default="admin", help="feature property with the country (default: admin)")
+    parser.add_argument("--region-key", default="name", help="feature property with the region (default: name)")
+    parser.add_argument("--fill-missing", action="store_true",
+                        help="fill empty region fields in locations.json")
+    args = parser.parse_args()
+
+    if np is None:
+        print("NumPy is required: pip install numpy", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Loading {args.geojson.name}...")
+    start = time.perf_counter()
+    index = RegionIndex(args.geojson, args.country_key, args.region_key)
+    print(f"Indexed {len(index.polygons)} polygons of {len(index.labels)} regions "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    locations = load_locations()
+    panoids = [p for p, e in locations.items()
+               if isinstance(e, dict) and e.get('lat') is not None and e.get('lng') is not None]
+    lats = [float(locations[p]['lat']) for p in panoids]
+    lngs = [float(locations[p]['lng']) for p in panoids]
+
+    start = time.perf_counter()
+    assigned = index.assign(lats, lngs)
+    elapsed = time.perf_counter() - start
+    print(f"Assigned {len(panoids)} points in {elapsed:.2f}s "
+          f"({len(panoids) / max(elapsed, 1e-9):,.0f} points/s)")
+
+    assignments = {}
+    unassigned = region_mismatch = country_mismatch = 0
+    for panoid, feature_idx in zip(panoids, assigned.tolist()):
+        entry = locations[panoid]
+        if feature_idx < 0:
+            unassigned += 1
+            continue
+        raw_country, region = index.labels[feature_idx]
+        country = geojson_country(raw_country, entry['lat'], entry['lng'])
+        assignments[panoid] = {"country": country, "region": region}
+        if entry.get('region') and not is_fuzzy_name_match(entry['region'], region):
+            region_mismatch += 1
+            print(f"  region  | {panoid} stored '{entry['region']}' -> '{region}'")
+        stored = {normalize_country(entry.get(field), entry['lat'], entry['lng'])
+                  for field in ("country", "nominatimCountry") if entry.get(field)}
+        if stored and country and country not in stored:
+            country_mismatch += 1
+            print(f"  country | {panoid} stored '{entry.get('nominatimCountry') or entry['country']}' "
+                  f"-> '{country}' ({raw_country})")
+
+    print(f"\n{'='*50}")
+    print(f"  assigned        : {len(assignments):6}")
+    print(f"  outside polygons: {unassigned:6}")
+    print(f"  region mismatch : {region_mismatch:6}")
+    print(f"  country mismatch: {country_mismatch:6}")
+    print(f"{'='*50}")
+
+    print(f"Saving to {ASSIGNMENTS_FILE_PATH.name}...")
+    with open(ASSIGNMENTS_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(assignments, f, indent=2, ensure_ascii=False)
+
+    if args.fill_missing:
+        # Fill the base file only; log entries are folded in by locations_log.py
+        with open(LOCATIONS_FILE_PATH, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        filled = 0
+        for panoid, assignment in assignments.items():
+            entry = base.get(panoid)
+            if not isinstance(entry, dict):
+                continue
+            if not entry.get('region') and assignment['region']:
+                entry['region'] = assignment['region']
+                filled += 1
+        if filled:
+            print(f"Filling {filled} empty regions in locations.json...")
+            write_json_atomic(LOCATIONS_FILE_PATH, base)
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
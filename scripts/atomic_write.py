@@ -0,0 +1,26 @@
+"""
+Atomic file writes for the data files.
+
+Content goes to a temp file next to the target, is fsynced and then
+renamed over the target, so readers (and interrupted runs) never see a
+partially written file.
+"""
+
+import json
+import os
+from pathlib import Path
+
+
+def write_text_atomic(path: Path, text: str):
+    """Write `text` through a temp file and rename."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path: Path, data):
+    """Write `data` as indented JSON through a temp file and rename."""
+    write_text_atomic(path, json.dumps(data, indent=2, ensure_ascii=False))
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Incremental build of all derived data files.
+
+Every stage declares the files (or meta fields of plonkit_data.json) it
+reads and writes, plus its script. A stage only runs when the
+fingerprint of its code (the script and every local module it imports)
+or inputs differs from the last successful run, or when its outputs were
+changed or deleted since.
+
+A stage waits for the stages that write what it reads, down to the
+field; stages rewriting the same file never run at the same time, but
+are otherwise unordered. Everything else runs in parallel.
+
+    python scripts/build.py                 # everything that is stale
+    python scripts/build.py tags            # one stage (and what it needs)
+    python scripts/build.py --dry-run
+    python scripts/build.py scrape          # the scrapers only run on request
+    python scripts/build.py guide_locations
+
+The generators rewrite plonkit_data.json in place, so their inputs and
+outputs are fingerprinted per field: editing a tag pattern reruns the
+tags stage and whatever reads tags, but not titles or scopes.
+rule_plans.json only speeds the title/scope generators up, so it is
+not one of their inputs: plans are verified to give identical results,
+and their fingerprint covers every rule's name, literals and source, so
+editing a rule ignores the old plans until they are recompiled.
+
+Only the data files the userscript fetches are committed; every other
+output here is derived and ignored by git, so a fresh checkout rebuilds
+them on its first run. Fingerprints are kept in data/build_state.json.
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple, Tuple
+
+from atomic_write import write_json_atomic
+
+ROOT_DIR = Path(__file__).parent.parent
+SCRIPTS_DIR = ROOT_DIR / "scripts"
+DATA_DIR = ROOT_DIR / "data"
+STATE_FILE_PATH = DATA_DIR / "build_state.json"
+
+PLONKIT = DATA_DIR / "plonkit_data.json"
+USER_METAS = DATA_DIR / "metas.json"
+LOCATIONS = DATA_DIR / "locations.json"
+LOCATIONS_LOG = DATA_DIR / "locations.log.jsonl"
+RULE_PLANS = DATA_DIR / "rule_plans.json"
+
+
+class Fields(NamedTuple):
+    """Some meta fields of a plonkit_data.json-shaped file."""
+    path: Path
+    fields: Tuple[str, ...]
+
+
+class Stage(NamedTuple):
+    name: str
+    command: Tuple[str, ...]
+    inputs: tuple
+    outputs: tuple
+    code: Tuple[str, ...]  # entry points relative to scripts/; local imports are followed
+    explicit: bool = False  # only run when named on the command line
+
+
+def _script(name: str, *args) -> tuple:
+    return (sys.executable, f"scripts/{name}") + args
+
+
+STAGES = [
+    Stage("scrape", ("node", "scraper.js"),
+          inputs=(), outputs=(PLONKIT,),
+          code=("../scraper.js",), explicit=True),
+    Stage("guide_locations", ("node", "scripts/extract_guide_locations.js"),
+          inputs=(Fields(PLONKIT, ("imageUrl",)),), outputs=(LOCATIONS,),
+          code=("extract_guide_locations.js",), explicit=True),
+    Stage("titles", _script("generate_titles.py"),
+          inputs=(Fields(PLONKIT, ("description", "title")),),
+          outputs=(Fields(PLONKIT, ("title",)),),
+          code=("generate_titles.py",)),
+    Stage("scopes", _script("generate_scopes.py"),
+          inputs=(Fields(PLONKIT, ("title", "description", "note", "section")),),
+          outputs=(Fields(PLONKIT, ("scope",)),),
+          code=("generate_scopes.py",)),
+    Stage("tags", _script("generate_tags.py"),
+          inputs=(Fields(PLONKIT, ("title", "description", "note")),),
+          outputs=(Fields(PLONKIT, ("tags",)),),
+          code=("generate_tags.py",)),
+    Stage("rule_plans", _script("compile_rule_plans.py"),
+          inputs=(Fields(PLONKIT, ("title", "description", "note", "section")),),
+          outputs=(RULE_PLANS,),
+          code=("compile_rule_plans.py",)),
+    Stage("footprints", _script("generate_footprints.py"),
+          inputs=(LOCATIONS, LOCATIONS_LOG, Fields(PLONKIT, ("scope",)), USER_METAS),
+          outputs=(DATA_DIR / "meta_footprints.json",),
+          code=("generate_footprints.py",)),
+    Stage("meta_store", _script("meta_store.py", "build"),
+          inputs=(PLONKIT, USER_METAS),
+          outputs=(DATA_DIR / "metas.store",),
+          code=("meta_store.py",)),
+    Stage("country_tables", _script("build_country_tables.py"),
+          inputs=(LOCATIONS, LOCATIONS_LOG, USER_METAS,
+                  Fields(PLONKIT, ("scope", "country", "region", "city", "road", "lat", "lng"))),
+          outputs=(DATA_DIR / "country_tables.json",),
+          code=("build_country_tables.py",)),
+    Stage("facets", _script("build_facets.py", "build"),
+          inputs=(USER_METAS, Fields(PLONKIT, ("country", "section", "scope", "tags"))),
+          outputs=(DATA_DIR / "facets.json",),
+          code=("build_facets.py",)),
+]
+
+
+def _path(item) -> Path:
+    return item.path if isinstance(item, Fields) else item
+
+
+def _overlaps(a, b) -> bool:
+    """Do two inputs/outputs cover some of the same data?"""
+    if _path(a) != _path(b):
+        return False
+    if isinstance(a, Fields) and isinstance(b, Fields):
+        return bool(set(a.fields) & set(b.fields))
+    return True
+
+
+def local_imports(name: str) -> list:
+    """`name` plus every scripts/ module it imports, transitively."""
+    seen = []
+    todo = [name]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.append(name)
+        if not name.endswith(".py"):
+            continue
+        tree = ast.parse((SCRIPTS_DIR / name).read_text(encoding='utf-8'))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                modules = [node.module]
+            else:
+                continue
+            todo.extend(f"{m}.py" for m in modules if (SCRIPTS_DIR / f"{m}.py").exists())
+    return sorted(seen)
+
+
+def _label(item) -> str:
+    """Stable name of an input/output, independent of where the repo lives."""
+    name = _path(item).relative_to(ROOT_DIR).as_posix()
+    return f"{name}[{','.join(item.fields)}]" if isinstance(item, Fields) else name
+
+
+class Fingerprinter:
+    """Content hashes of files and meta fields, caching parsed JSON by mtime and size."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._parsed = {}  # path -> ((mtime_ns, size), data)
+
+    def _load(self, path: Path):
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._parsed.get(path)
+            if cached and cached[0] == key:
+                return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        with self._lock:
+            self._parsed[path] = (key, data)
+        return data
+
+    def item(self, item) -> str:
+        path = _path(item)
+        if not path.exists():
+            return "missing"
+        if not isinstance(item, Fields):
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        projection = [
+            [country_data.get('country'),
+             [[meta.get('id')] + [meta.get(field) for field in item.fields]
+              for meta in country_data.get('metas', [])]]
+            for country_data in self._load(path)
+        ]
+        return hashlib.sha256(json.dumps(projection, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def items(self, items) -> str:
+        h = hashlib.sha256()
+        for item in items:
+            h.update(f"{_label(item)}={self.item(item)}\n".encode('utf-8'))
+        return h.hexdigest()
+
+    def code(self, stage: Stage) -> str:
+        h = hashlib.sha256(" ".join(stage.command[1:]).encode('utf-8'))
+        names = sorted({module for entry in stage.code for module in local_imports(entry)})
+        for name in names:
+            h.update(f"{name}\0".encode('utf-8'))
+            h.update((SCRIPTS_DIR / name).read_bytes())
+        return h.hexdigest()
+
+
+def dependencies(stages: list) -> dict:
+    """Stage name -> names of the stages writing something it reads.
+
+    Raises ValueError if a stage reads what a later-declared stage writes:
+    declaration order must be a valid build order.
+    """
+    deps = {}
+    for i, stage in enumerate(stages):
+        deps[stage.name] = set()
+        for j, other in enumerate(stages):
+            if other is stage or not any(_overlaps(r, w) for r in stage.inputs for w in other.outputs):
+                continue
+            if j > i:
+                raise ValueError(f"stage '{stage.name}' reads what the later stage '{other.name}' writes")
+            deps[stage.name].add(other.name)
+    return deps
+
+
+def conflicts(a: Stage, b: Stage) -> bool:
+    """Stages rewriting the same file must not run at the same time."""
+    return bool({_path(x) for x in a.outputs} & {_path(x) for x in b.outputs})
+
+
+def select(stages: list, deps: dict, names: list) -> list:
+    """Requested stages plus everything they depend on; all non-explicit stages by default."""
+    by_name = {s.name: s for s in stages}
+    if not names:
+        return [s for s in stages if not s.explicit]
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)} (available: {', '.join(by_name)})", file=sys.stderr)
+        sys.exit(2)
+    wanted = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(d for d in deps[name] if not by_name[d].explicit or d in names)
+    return [s for s in stages if s.name in wanted]
+
+
+class Builder:
+    def __init__(self, stages: list, force: bool = False, verbose: bool = False):
+        self.stages = stages
+        self.force = force
+        self.verbose = verbose
+        self.fp = Fingerprinter()
+        self.state = {}
+        if STATE_FILE_PATH.exists():
+            with open(STATE_FILE_PATH, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        self._state_lock = threading.Lock()
+
+    def status(self, stage: Stage) -> str:
+        """'up to date' or why the stage has to run."""
+        if self.force or stage.explicit:
+            return "forced" if self.force else "requested"
+        last = self.state.get(stage.name)
+        if last is None:
+            return "never built"
+        if last['code'] != self.fp.code(stage):
+            return "code changed"
+        if last['inputs'] != self.fp.items(stage.inputs):
+            return "inputs changed"
+        if last['outputs'] != self.fp.items(stage.outputs):
+            return "outputs changed"
+        return "up to date"
+
+    def run_stage(self, stage: Stage) -> tuple:
+        """(status, seconds, reason) for one stage."""
+        reason = self.status(stage)
+        if reason == "up to date":
+            return "skipped", 0.0, reason
+        start = time.perf_counter()
+        proc = subprocess.run(stage.command, cwd=ROOT_DIR, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        output = proc.stdout + proc.stderr
+        if proc.returncode != 0:
+            tail = "\n".join(output.splitlines()[-20:])
+            print(f"[{stage.name}] failed with exit code {proc.returncode}:\n{tail}", file=sys.stderr)
+            return "failed", elapsed, reason
+        if self.verbose:
+            print(f"[{stage.name}]\n{output}")
+        # Record fingerprints as the stage left them: in-place stages change their own inputs
+        record = {
+            "code": self.fp.code(stage),
+            "inputs": self.fp.items(stage.inputs),
+            "outputs": self.fp.items(stage.outputs),
+        }
+        with self._state_lock:
+            self.state[stage.name] = record
+            write_json_atomic(STATE_FILE_PATH, self.state)
+        return "ran", elapsed, reason
+
+    def build(self, deps: dict, jobs: int) -> dict:
+        """Run stages as their dependencies finish; returns name -> (status, seconds, reason)."""
+        results = {}
+        pending = list(self.stages)
+        selected = {s.name for s in self.stages}
+        running = {}
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            while pending or running:
+                for stage in list(pending):
+                    waits = deps[stage.name] & selected
+                    if any(d not in results for d in waits):
+                        continue
+                    if any(conflicts(stage, other) for other in running.values()):
+                        continue
+                    pending.remove(stage)
+                    if any(results[d][0] in ("failed", "blocked") for d in waits):
+                        results[stage.name] = ("blocked", 0.0, "dependency failed")
+                        continue
+                    running[executor.submit(self.run_stage, stage)] = stage
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    results[stage.name] = future.result()
+                    status, elapsed, reason = results[stage.name]
+                    print(f"  {stage.name:15} {status:8} {elapsed:7.2f}s  ({reason})")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild stale derived data files.")
+    parser.add_argument("stages", nargs="*", help="stages to build (default: all but explicit ones)")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="stages to run in parallel (default: 4)")
+    parser.add_argument("--force", action="store_true", help="rerun stages even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only show which stages are stale")
+    parser.add_argument("--verbose", "-v", action="store_true", help="print the output of every stage")
+    args = parser.parse_args()
+
+    deps = dependencies(STAGES)
+    stages = select(STAGES, deps, args.stages)
+    builder = Builder(stages, force=args.force, verbose=args.verbose)
+
+    if args.dry_run:
+        for stage in stages:
+            after = ", ".join(sorted(deps[stage.name] & {s.name for s in stages}))
+            print(f"  {stage.name:15} {builder.status(stage):16} {'after ' + after if after else ''}")
+            if args.verbose:
+                code = sorted({m for entry in stage.code for m in local_imports(entry)})
+                print(f"  {'':15} code: {', '.join(code)}")
+        print("(stages may still run if an earlier stage changes their inputs)")
+        return
+
+    print(f"Building {len(stages)} stages with {args.jobs} jobs...")
+    start = time.perf_counter()
+    results = builder.build(deps, args.jobs)
+    wall = time.perf_counter() - start
+
+    print(f"\n{'='*50}")
+    print("BUILD REPORT:")
+    print('='*50)
+    for stage in stages:
+        status, elapsed, reason = results[stage.name]
+        print(f"  {stage.name:15}: {status:8} {elapsed:7.2f}s  ({reason})")
+    print(f"{'='*50}")
+    busy = sum(r[1] for r in results.values())
+    print(f"Total: {wall:.2f}s wall, {busy:.2f}s in stages\n")
+
+    if any(r[0] in ("failed", "blocked") for r in results.values()):
+        sys.exit(1)
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Build per-country prediction tables for the non-distance scopes.
+
+evaluateProximityMetas() in the userscript normalizes the country of
+every location entry and meta on every round and scans all metas for
+Countrywide/Region/City/Road matches. This script does that work once:
+country names go through the same normalizeCountry() rules, and for each
+normalized country it emits
+
+- countrywide: meta ids with scope Countrywide
+- region:      region name key -> meta ids with scope Region
+- city:        city name key -> meta ids with scope City
+- road:        road name key -> meta ids with scope Road
+
+Linked locations are keyed like the userscript does it (nominatimCountry
+first, then country); metas by their own country. Matching at runtime is
+then a lookup of tables[currentCountry] and tables[currentNominatimCountry].
+
+Name keys come from name_key(): lowercased, split into tokens like
+isFuzzyNameMatch() does, generic tokens ("region", "street", ...)
+dropped. Lookups must build their key the same way, so "Kunene Region"
+finds "Kunene". A direct dictionary lookup covers names that differ only
+in case and generic tokens; isFuzzyNameMatch() also accepts a name whose
+tokens are a subset of the other's ("Nord" vs "Nord Pas de Calais"), so
+lookup_name() checks every key sharing a token with the name. Because
+keys carry no generic tokens, this never misses a match of
+isFuzzyNameMatch() but can be slightly more lenient ("Nord Region" vs
+"Nord Pas").
+
+Also reports country names that never meet (only used by locations or
+only by metas) and locations whose country and nominatimCountry disagree.
+"""
+
+import json
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from locations_log import load_locations
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+PLONKIT_FILE_PATH = DATA_DIR / "plonkit_data.json"
+USER_METAS_FILE_PATH = DATA_DIR / "metas.json"
+TABLES_FILE_PATH = DATA_DIR / "country_tables.json"
+
+NAME_SCOPES = ("countrywide", "region", "city", "road")
+
+# Same generic tokens as isFuzzyNameMatch() in the userscript
+GENERIC_TOKENS = {'region', 'province', 'district', 'county', 'state', 'prefecture', 'road', 'street', 'avenue',
+                  'boulevard', 'way', 'dr', 'drive', 'ln', 'lane', 'hwy', 'highway', 'str', 'route'}
+TOKEN_SEPARATOR = re.compile(r"[\s,.\-]+")
+
+
+def is_fuzzy_name_match(a, b) -> bool:
+    """Port of isFuzzyNameMatch() from geoguessr-meta.user.js."""
+    if not a or not b:
+        return False
+    a = str(a).lower().strip()
+    b = str(b).lower().strip()
+    if a == b:
+        return True
+    tokens_a = TOKEN_SEPARATOR.split(a)
+    tokens_b = TOKEN_SEPARATOR.split(b)
+    short, long_ = (tokens_a, tokens_b) if len(tokens_a) < len(tokens_b) else (tokens_b, tokens_a)
+    all_match = all(tok in GENERIC_TOKENS or tok in long_ for tok in short)
+    non_generic = any(tok not in GENERIC_TOKENS and tok in long_ for tok in short)
+    return all_match and non_generic
+
+
+def name_key(name) -> str:
+    """Table key of a region/city/road name: lowercased non-generic tokens ('' for no name)."""
+    if not name:
+        return ""
+    lowered = str(name).lower().strip()
+    tokens = [tok for tok in TOKEN_SEPARATOR.split(lowered) if tok and tok not in GENERIC_TOKENS]
+    # Names made only of generic tokens still match themselves exactly
+    return " ".join(tokens) or lowered
+
+
+def token_index(names: dict) -> dict:
+    """Map each token of a table's name keys -> keys containing it."""
+    index = defaultdict(list)
+    for key in names:
+        for tok in key.split(" "):
+            index[tok].append(key)
+    return index
+
+
+def lookup_name(names: dict, name, index: dict = None) -> set:
+    """Meta ids of a region/city/road table whose key fuzzy-matches `name`.
+
+    isFuzzyNameMatch() needs a shared non-generic token, so only keys
+    sharing a token with `name` are checked. Pass token_index(names) when
+    looking up many names in the same table.
+    """
+    key = name_key(name)
+    if not key:
+        return set()
+    if index is None:
+        index = token_index(names)
+    candidates = {other for tok in key.split(" ") for other in index.get(tok, ())}
+    found = set()
+    for other in candidates:
+        if is_fuzzy_name_match(key, other):
+            found.update(names[other])
+    return found
+
+
+def _france(lat, lng):
+    # Reunion Check
+    if lat < -19 and lat > -22 and lng > 54 and lng < 57:
+        return "Reunion"
+    return "France"
+
+
+def _china(lat, lng):
+    # Hong Kong / Macau Check
+    if lat > 22 and lat < 23 and lng > 113.8 and lng < 114.5:
+        return "Hong Kong"
+    if lat > 22 and lat < 22.3 and lng > 113.5 and lng < 113.6:
+        return "Macau"
+    return "China"
+
+
+# Mirrors COUNTRY_ALIAS_MAP in geoguessr-meta.user.js
+COUNTRY_ALIAS_MAP = {
+    "France": _france,
+    "China": _china,
+    "United States": "USA",
+    "United Kingdom": "UK",
+    "Virgin Islands, U.S.": "US Virgin Islands",
+    "United Arab Emirates": "UAE",
+}
+
+
+def _to_float(value):
+    """parseFloat() semantics for the coordinate checks (NaN fails every comparison)."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+
+def normalize_country(name, lat=None, lng=None) -> str:
+    """Port of normalizeCountry() from the userscript."""
+    if not name:
+        return "Unknown"
+    mapping = COUNTRY_ALIAS_MAP.get(name)
+    if mapping is None:
+        return name
+    if callable(mapping):
+        return mapping(_to_float(lat), _to_float(lng))
+    return mapping
+
+
+def as_roads(value) -> list:
+    """Road name keys from a string or list field."""
+    if not value:
+        return []
+    values = value if isinstance(value, list) else [value]
+    return [key for key in map(name_key, values) if key]
+
+
+def load_metas() -> list:
+    """User metas first, then Plonk It metas, deduplicated by id (as the userscript does)."""
+    metas = []
+    if USER_METAS_FILE_PATH.exists():
+        with open(USER_METAS_FILE_PATH, 'r', encoding='utf-8') as f:
+            metas.extend(json.load(f))
+    with open(PLONKIT_FILE_PATH, 'r', encoding='utf-8') as f:
+        for country_data in json.load(f):
+            metas.extend(country_data.get('metas', []))
+    seen = set()
+    unique = []
+    for meta in metas:
+        if meta.get('id') and meta['id'] not in seen:
+            seen.add(meta['id'])
+            unique.append(meta)
+    return unique
+
+
+def add_to_table(tables, country, scope, meta_id, region=None, city=None, roads=()):
+    table = tables[country]
+    if scope == "countrywide":
+        table["countrywide"].add(meta_id)
+    elif scope == "region" and name_key(region):
+        table["region"][name_key(region)].add(meta_id)
+    elif scope == "city" and name_key(city):
+        table["city"][name_key(city)].add(meta_id)
+    elif scope == "road":
+        for road in roads:
+            table["road"][road].add(meta_id)
+
+
+def main():
+    print("Loading locations and metas...")
+    locations = load_locations()
+    metas = load_metas()
+    scopes = {meta['id']: (meta.get('scope') or '').lower() for meta in metas}
+
+    tables = defaultdict(lambda: {"countrywide": set(), "region": defaultdict(set),
+                                  "city": defaultdict(set), "road": defaultdict(set)})
+    location_countries = Counter()
+    meta_countries = Counter()
+    disagreements = Counter()
+
+    # Phase 1: linked locations, keyed by the entry's country
+    for entry in locations.values():
+        if not isinstance(entry, dict):
+            continue
+        lat, lng = entry.get('lat'), entry.get('lng')
+        country = normalize_country(entry.get('country'), lat, lng)
+        final_country = normalize_country(entry.get('nominatimCountry') or country, lat, lng)
+        if entry.get('nominatimCountry') and final_country != country:
+            disagreements[(country, final_country)] += 1
+        location_countries[final_country] += 1
+        for meta_id in entry.get('metas', []):
+            scope = scopes.get(meta_id)
+            if scope in NAME_SCOPES:
+                add_to_table(tables, final_country, scope, meta_id, entry.get('region'),
+                             entry.get('city'), as_roads(entry.get('road')))
+
+    # Phase 2: metas with their own location data
+    for meta in metas:
+        country = normalize_country(meta.get('country'), meta.get('lat'), meta.get('lng'))
+        meta_countries[country] += 1
+        if scopes[meta['id']] in NAME_SCOPES:
+            add_to_table(tables, country, scopes[meta['id']], meta['id'], meta.get('region'),
+                         meta.get('city'), as_roads(meta.get('road')))
+
+    output = {}
+    for country in sorted(tables):
+        table = tables[country]
+        output[country] = {
+            "countrywide": sorted(table["countrywide"]),
+            **{scope: {name: sorted(ids) for name, ids in sorted(table[scope].items())}
+               for scope in ("region", "city", "road")},
+        }
+
+    print(f"\n{'='*50}")
+    print("COUNTRY TABLES:")
+    print('='*50)
+    print(f"  countries           : {len(output):5}")
+    for scope in NAME_SCOPES:
+        if scope == "countrywide":
+            total = sum(len(t["countrywide"]) for t in output.values())
+        else:
+            total = sum(len(ids) for t in output.values() for ids in t[scope].values())
+        print(f"  {scope + ' entries':20}: {total:5}")
+    print(f"{'='*50}")
+
+    unresolved = sorted(set(location_countries) - set(meta_countries))
+    if unresolved:
+        print("\nUnresolved: location countries that no meta uses:")
+        for name in unresolved:
+            print(f"  {name:40} {location_countries[name]:5} locations")
+    if disagreements:
+        print("\nAmbiguous: country vs nominatimCountry (nominatimCountry wins):")
+        for (country, nominatim), num in disagreements.most_common():
+            print(f"  {country:40} -> {nominatim:30} {num:5} locations")
+
+    print(f"\nSaving to {TABLES_FILE_PATH.name}...")
+    with open(TABLES_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Build a faceted count cube and per-value postings over all metas.
+
+Every meta gets a dense number (its position in the sorted id list).
+For each facet value (country, section, scope, tag) the sorted numbers
+of its metas are stored either as a bitset or as varint-encoded deltas,
+whichever is smaller. Filters become set operations: values of one
+facet are OR-ed, facets are AND-ed, with Python ints as bitsets.
+
+The cube counts metas per (country, section, scope, tag). Metas without
+tags count under "(none)"; since a meta can have several tags, the rows
+with tag "*" count every meta once and give the totals for the other
+facets.
+
+    python scripts/build_facets.py build
+    python scripts/build_facets.py stats
+    python scripts/build_facets.py query --scope Unique --scope Countrywide --country France
+
+Writes data/facets.json.
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from meta_store import load_source_metas
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+FACETS_FILE_PATH = DATA_DIR / "facets.json"
+
+VERSION = 1
+FACETS = ("country", "section", "scope", "tag")
+NO_TAGS = "(none)"
+ALL_TAGS = "*"
+
+
+def meta_facets(meta: dict) -> dict:
+    """Facet values of one meta; the tag facet is multi-valued, without repeats."""
+    return {
+        "country": meta.get('country') or "Unknown",
+        "section": meta.get('section') or "",
+        "scope": meta.get('scope') or "",
+        # User metas can repeat a tag ("road, road"); postings need unique numbers
+        "tag": list(dict.fromkeys(meta.get('tags') or [])) or [NO_TAGS],
+    }
+
+
+def _varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_postings(numbers: list, total: int) -> dict:
+    """Smaller of bitset and varint deltas for a sorted list of meta numbers."""
+    deltas = bytearray()
+    prev = -1
+    for n in numbers:
+        _varint(n - prev - 1, deltas)
+        prev = n
+    bits = 0
+    for n in numbers:
+        bits |= 1 << n
+    bitset = bits.to_bytes((total + 7) // 8, 'little')
+    if len(bitset) < len(deltas):
+        return {"count": len(numbers), "bits": base64.b64encode(bitset).decode('ascii')}
+    return {"count": len(numbers), "deltas": base64.b64encode(bytes(deltas)).decode('ascii')}
+
+
+def decode_postings(entry: dict) -> int:
+    """Postings entry -> bitset as a Python int (bit n set = meta number n)."""
+    if "bits" in entry:
+        return int.from_bytes(base64.b64decode(entry['bits']), 'little')
+    bits = 0
+    n = -1
+    shift = delta = 0
+    for byte in base64.b64decode(entry['deltas']):
+        delta |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        n += delta + 1
+        bits |= 1 << n
+        shift = delta = 0
+    return bits
+
+
+def popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def build_facets(metas: dict) -> dict:
+    """Cube and postings for `metas` (id -> meta)."""
+    ids = sorted(metas)
+    postings = {facet: {} for facet in FACETS}
+    cube = Counter()
+    for n, meta_id in enumerate(ids):
+        values = meta_facets(metas[meta_id])
+        key = (values['country'], values['section'], values['scope'])
+        for facet in FACETS:
+            for value in (values[facet] if facet == "tag" else [values[facet]]):
+                postings[facet].setdefault(value, []).append(n)
+        for tag in values['tag']:
+            cube[key + (tag,)] += 1
+        cube[key + (ALL_TAGS,)] += 1
+
+    return {
+        "version": VERSION,
+        "ids": ids,
+        "facets": {facet: {value: encode_postings(numbers, len(ids))
+                           for value, numbers in sorted(values.items())}
+                   for facet, values in postings.items()},
+        "cube": [list(key) + [count] for key, count in sorted(cube.items())],
+    }
+
+
+class FacetIndex:
+    """Loaded facets.json with bitset filters and cube roll-ups."""
+
+    def __init__(self, path: Path = FACETS_FILE_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != VERSION:
+            raise ValueError(f"{path.name} has version {data.get('version')}, expected {VERSION}")
+        self.ids = data['ids']
+        self.all = (1 << len(self.ids)) - 1
+        self._facets = data['facets']
+        self._decoded = {}
+        self.cube = [tuple(row) for row in data['cube']]
+
+    def values(self, facet: str) -> list:
+        return list(self._facets[facet])
+
+    def bits(self, facet: str, value: str) -> int:
+        key = (facet, value)
+        if key not in self._decoded:
+            entry = self._facets[facet].get(value)
+            self._decoded[key] = decode_postings(entry) if entry else 0
+        return self._decoded[key]
+
+    def select(self, **filters) -> int:
+        """Bitset of metas matching every facet; values within one facet are alternatives."""
+        result = self.all
+        for facet, values in filters.items():
+            if not values:
+                continue
+            union = 0
+            for value in values:
+                union |= self.bits(facet, value)
+            result &= union
+        return result
+
+    def meta_ids(self, bits: int) -> list:
+        return [meta_id for n, meta_id in enumerate(self.ids) if bits >> n & 1]
+
+    def distribution(self, facet: str, **filters) -> Counter:
+        """Meta count per value of `facet` from the cube, restricted to single values per facet."""
+        pos = FACETS.index(facet)
+        counts = Counter()
+        for row in self.cube:
+            if (row[3] == ALL_TAGS) != (facet != "tag"):
+                continue
+            if all(row[FACETS.index(f)] == v for f, v in filters.items()):
+                counts[row[pos]] += row[4]
+        return counts
+
+
+def _print_distribution(label: str, counts: Counter):
+    print(f"\n{'='*50}")
+    print(f"{label} DISTRIBUTION:")
+    print('='*50)
+    for value, num in sorted(counts.items(), key=lambda x: -x[1]):
+        print(f"  {value or '(empty)':25}: {num:5} metas")
+    print(f"{'='*50}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the faceted meta cube.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="write data/facets.json")
+    stats = sub.add_parser("stats", help="scope and tag distributions from the cube")
+    stats.add_argument("--country", help="restrict to one country")
+    query = sub.add_parser("query", help="metas matching facet filters")
+    for facet in FACETS:
+        query.add_argument(f"--{facet}", action="append", default=[], help=f"{facet} value (repeatable)")
+    query.add_argument("--show", type=int, default=20, help="meta ids to print (default: 20)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print("Loading metas...")
+        facets = build_facets(load_source_metas())
+        print(f"Saving {len(facets['ids'])} metas, {len(facets['cube'])} cube cells to {FACETS_FILE_PATH.name}...")
+        with open(FACETS_FILE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(facets, f, ensure_ascii=False, separators=(',', ':'))
+        print("Done!")
+        return
+
+    if not FACETS_FILE_PATH.exists():
+        print(f"{FACETS_FILE_PATH.name} not found, run 'build' first.", file=sys.stderr)
+        sys.exit(1)
+    index = FacetIndex()
+
+    if args.command == "stats":
+        filters = {"country": args.country} if args.country else {}
+        _print_distribution("SCOPE", index.distribution("scope", **filters))
+        _print_distribution("TAG", index.distribution("tag", **filters))
+        return
+
+    start = time.perf_counter()
+    bits = index.select(**{facet: getattr(args, facet) for facet in FACETS})
+    elapsed = (time.perf_counter() - start) * 1000
+    matches = index.meta_ids(bits)
+    for meta_id in matches[:args.show]:
+        print(f"  {meta_id}")
+    print(f"{len(matches)} metas match ({elapsed:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Compile per-country rule plans for the scope and title generators.
+
+Profiles which rules of SCOPE_RULES and TITLE_RULES fire per country on
+plonkit_data.json and writes data/rule_plans.json. The generators then
+skip rules that never fired in a country, unless that rule's literal
+prerequisites occur in the text (see rules.py).
+
+Before anything is written, every rule with literals is run on the
+whole corpus to check that it only fires when one of its literals
+occurs, and the compiled plans are checked against the full rule sets.
+Either failure aborts without writing.
+"""
+
+import json
+import sys
+from collections import defaultdict
+
+from atomic_write import write_json_atomic
+from generate_scopes import JSON_FILE_PATH, SCOPE_RULES, evaluate_scope
+from generate_titles import TITLE_RULES, evaluate_title
+from rules import RULE_PLANS_FILE_PATH, RulePlan, rules_fingerprint
+
+
+def rules_evaluated(rules: list, fired_name) -> int:
+    """How many rules run until `fired_name` fires (all of them if none did)."""
+    for i, rule in enumerate(rules):
+        if rule.name == fired_name:
+            return i + 1
+    return len(rules)
+
+
+def check_literals(kind: str, rules: list, data: list, rule_args, haystack):
+    """Exit if a rule fires on a meta whose text contains none of its literals."""
+    for country_data in data:
+        country = country_data.get('country', 'Unknown')
+        for meta in country_data.get('metas', []):
+            text = haystack(meta)
+            args = rule_args(meta, country)
+            for rule in rules:
+                if rule.literals is None or any(lit in text for lit in rule.literals):
+                    continue
+                if rule.fn(*args) is not None:
+                    print(f"ERROR: {kind} rule '{rule.name}' fires on {meta['id']} without any of its literals",
+                          file=sys.stderr)
+                    sys.exit(1)
+
+
+def main():
+    print("Loading plonkit_data.json...")
+    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    kinds = {
+        "scope": (SCOPE_RULES, lambda meta, country, plan: evaluate_scope(
+            meta.get('title', ''), meta.get('description', ''), meta.get('note', ''), meta.get('section', ''), plan)),
+        "title": (TITLE_RULES, lambda meta, country, plan: evaluate_title(
+            meta.get('description', ''), country, plan)),
+    }
+    haystacks = {
+        "scope": lambda meta: f"{meta.get('description', '').lower()}\n{meta.get('title', '').lower()}",
+        "title": lambda meta: meta.get('description', '').lower(),
+    }
+    rule_args = {
+        "scope": lambda meta, country: (meta.get('title', ''), meta.get('description', ''), meta.get('section', ''),
+                                        meta.get('description', '').lower(), meta.get('title', '').lower()),
+        "title": lambda meta, country: (meta.get('description', ''), meta.get('description', '').lower(), country),
+    }
+
+    output = {"version": 1}
+    for kind, (rules, evaluate) in kinds.items():
+        check_literals(kind, rules, data, rule_args[kind], haystacks[kind])
+
+        # Profile: which rules fire per country with the full rule set
+        fired = defaultdict(set)
+        full_results = {}
+        for country_data in data:
+            country = country_data.get('country', 'Unknown')
+            for meta in country_data.get('metas', []):
+                result, name = evaluate(meta, country, None)
+                full_results[meta['id']] = (result, name)
+                if name is not None:
+                    fired[country].add(name)
+
+        plans = {country: RulePlan(rules, names) for country, names in fired.items()}
+
+        # Verify and measure the plans on the same corpus
+        full_evals = planned_evals = revived = total = 0
+        for country_data in data:
+            country = country_data.get('country', 'Unknown')
+            plan = plans.get(country)
+            for meta in country_data.get('metas', []):
+                result, name = evaluate(meta, country, plan)
+                if (result, name) != full_results[meta['id']]:
+                    print(f"ERROR: {kind} plan for {country} changes the result of {meta['id']}", file=sys.stderr)
+                    sys.exit(1)
+                total += 1
+                full_evals += rules_evaluated(rules, name)
+                if plan is None:
+                    planned_evals += rules_evaluated(rules, name)
+                    continue
+                haystack = haystacks[kind](meta)
+                if plan.needs_full(haystack):
+                    revived += 1
+                planned_evals += rules_evaluated(plan.active_rules(haystack), name)
+
+        kept = sum(len(p.rules) for p in plans.values()) / max(len(plans), 1)
+        print(f"\n{kind.upper()} RULES ({len(rules)} total):")
+        print(f"  rules kept per country: {kept:.1f} on average")
+        print(f"  metas reviving rules:   {revived}/{total}")
+        print(f"  rule evaluations/meta:  {full_evals / max(total, 1):.2f} -> {planned_evals / max(total, 1):.2f}")
+
+        output[kind] = {
+            "fingerprint": rules_fingerprint(rules),
+            "countries": {country: [r.name for r in rules if r.name in names]
+                          for country, names in sorted(fired.items())},
+        }
+
+    print(f"\nSaving to {RULE_PLANS_FILE_PATH.name}...")
+    # Atomic: the generators may be reading the plans while they are rebuilt
+    write_json_atomic(RULE_PLANS_FILE_PATH, output)
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Find near-identical panos in locations.json with a spatial grid hash.
+
+Panos are only ever clustered with panos of the same country and the
+exact same set of linked metas. Within such a group they are bucketed on
+a grid whose cells are at least --distance metres wide, so every pano
+within that distance sits in the same or a neighbouring cell. Clusters
+are built greedily: a pano joins the first representative within the
+distance, otherwise it becomes a representative itself, so every alias
+is within the distance of its representative.
+
+    python scripts/dedupe_locations.py                  # report only
+    python scripts/dedupe_locations.py --write          # write compacted file
+    python scripts/dedupe_locations.py --distance 25 --output out.json
+
+The compacted file keeps one entry per cluster with an `aliases` list of
+the panoids folded into it.
+"""
+
+import argparse
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+
+from locations_log import load_locations
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+COMPACT_FILE_PATH = DATA_DIR / "locations_dedup.json"
+
+EARTH_RADIUS_M = 6371000
+M_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+MAX_GRID_LAT = 85.0
+
+
+def haversine_m(lat1, lng1, lat2, lng2) -> float:
+    """Great-circle distance in metres."""
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = (math.sin(dlat / 2) ** 2 +
+         math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def group_key(entry: dict):
+    """Entries may only be merged if this key is equal."""
+    return (entry.get('country'), entry.get('nominatimCountry'), tuple(sorted(entry.get('metas', []))))
+
+
+def cluster_group(points: list, distance_m: float) -> list:
+    """Greedy leader clustering of (panoid, lat, lng) points; returns [[rep, *aliases], ...]."""
+    max_lat = min(MAX_GRID_LAT, max(abs(lat) for _, lat, _ in points))
+    cell_lat = distance_m / M_PER_DEGREE
+    # Widest longitude span `distance_m` can cover within this group
+    cell_lng = cell_lat / math.cos(math.radians(max_lat))
+
+    grid = defaultdict(list)  # cell -> indices of representatives
+    clusters = []
+    for panoid, lat, lng in points:
+        row = math.floor(lat / cell_lat)
+        col = math.floor(lng / cell_lng)
+        home = None
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                for idx in grid.get((row + dr, col + dc), ()):
+                    _, rlat, rlng = clusters[idx][0]
+                    if haversine_m(lat, lng, rlat, rlng) <= distance_m:
+                        home = idx
+                        break
+                if home is not None:
+                    break
+            if home is not None:
+                break
+        if home is None:
+            grid[(row, col)].append(len(clusters))
+            clusters.append([(panoid, lat, lng)])
+        else:
+            clusters[home].append((panoid, lat, lng))
+    return [[p[0] for p in cluster] for cluster in clusters]
+
+
+def find_clusters(locations: dict, distance_m: float) -> list:
+    """Cluster all entries with coordinates; singletons are included."""
+    groups = defaultdict(list)
+    for panoid, entry in locations.items():
+        if not isinstance(entry, dict) or entry.get('lat') is None or entry.get('lng') is None:
+            continue
+        groups[group_key(entry)].append((panoid, float(entry['lat']), float(entry['lng'])))
+
+    clusters = []
+    for points in groups.values():
+        points.sort()
+        clusters.extend(cluster_group(points, distance_m))
+    return clusters
+
+
+def compact_locations(locations: dict, clusters: list) -> dict:
+    """One entry per cluster, with the other panoids listed as aliases."""
+    alias_of = {}
+    for cluster in clusters:
+        for alias in cluster[1:]:
+            alias_of[alias] = cluster[0]
+    aliases = defaultdict(list)
+    for alias, rep in alias_of.items():
+        aliases[rep].append(alias)
+
+    compacted = {}
+    for panoid, entry in locations.items():
+        if panoid in alias_of:
+            continue
+        if panoid in aliases:
+            entry = dict(entry, aliases=sorted(aliases[panoid]))
+        compacted[panoid] = entry
+    return compacted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-identical panos in locations.json.")
+    parser.add_argument("--distance", type=float, default=10.0, help="cluster radius in metres (default: 10)")
+    parser.add_argument("--write", action="store_true", help="write the compacted locations file")
+    parser.add_argument("--output", type=Path, default=COMPACT_FILE_PATH, help="compacted file path")
+    args = parser.parse_args()
+
+    print("Loading locations.json...")
+    locations = load_locations()
+    clusters = find_clusters(locations, args.distance)
+    merged = [c for c in clusters if len(c) > 1]
+    folded = sum(len(c) - 1 for c in merged)
+
+    print(f"\n{'='*50}")
+    print(f"DUPLICATE PANOS (within {args.distance:g} m, same country and metas):")
+    print('='*50)
+    for cluster in sorted(merged, key=lambda c: -len(c))[:20]:
+        entry = locations[cluster[0]]
+        print(f"  {cluster[0]} [{entry.get('country')}] +{len(cluster) - 1} aliases")
+    print(f"{'='*50}")
+    print(f"{len(locations)} entries -> {len(locations) - folded} ({len(merged)} clusters, {folded} aliases)\n")
+
+    if args.write:
+        print(f"Saving to {args.output.name}...")
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(compact_locations(locations, clusters), f, indent=2, ensure_ascii=False)
+        print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Generate geographic footprints for all metas linked in locations.json
+(including links still waiting in the locations log).
+
+A footprint summarizes every pano a meta is linked to:
+- centroid: mean lat/lng of the linked panos
+- bbox: [min_lat, min_lng, max_lat, max_lng], expanded by the scope radius
+- hull: convex hull of the linked panos (only with --hull)
+
+For distance scopes (1km ... 1000km) a matcher can reject a meta with a
+single bounding-box test before doing any per-pano haversine math.
+Name-matched scopes (Region, Road, Countrywide, Unique, ...) have radius
+0 and match by name anywhere, so their bbox is null and there is no
+pre-filter. Footprints are only recomputed for metas
+whose linked locations (or scope) changed since the last run.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+from pathlib import Path
+
+from locations_log import load_locations
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+PLONKIT_FILE_PATH = DATA_DIR / "plonkit_data.json"
+USER_METAS_FILE_PATH = DATA_DIR / "metas.json"
+FOOTPRINTS_FILE_PATH = DATA_DIR / "meta_footprints.json"
+
+FOOTPRINTS_VERSION = 3
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Mirrors getDistanceForScope() in geoguessr-meta.user.js
+SCOPE_DISTANCES_KM = {
+    "1km": 1,
+    "10km": 10,
+    "25km": 25,
+    "50km": 50,
+    "100km": 100,
+    "1000km": 1000,
+}
+
+
+def get_distance_for_scope(scope: str) -> float:
+    """Return the match radius in km for a scope (0 for name-matched scopes)."""
+    return SCOPE_DISTANCES_KM.get((scope or "").lower(), 0)
+
+
+def load_meta_scopes() -> dict:
+    """Map meta id -> scope for Plonk It metas and user metas."""
+    scopes = {}
+    with open(PLONKIT_FILE_PATH, 'r', encoding='utf-8') as f:
+        for country_data in json.load(f):
+            for meta in country_data.get('metas', []):
+                scopes[meta['id']] = meta.get('scope', '')
+    if USER_METAS_FILE_PATH.exists():
+        with open(USER_METAS_FILE_PATH, 'r', encoding='utf-8') as f:
+            for meta in json.load(f):
+                if meta.get('id'):
+                    scopes[meta['id']] = meta.get('scope', '')
+    return scopes
+
+
+def collect_linked_points(locations: dict) -> dict:
+    """Map meta id -> sorted list of (panoid, lat, lng) for every linked pano."""
+    points = {}
+    for panoid, entry in locations.items():
+        meta_ids = entry if isinstance(entry, list) else entry.get('metas', [])
+        if isinstance(entry, list) or entry.get('lat') is None or entry.get('lng') is None:
+            continue
+        lat = float(entry['lat'])
+        lng = float(entry['lng'])
+        for meta_id in meta_ids:
+            points.setdefault(meta_id, []).append((panoid, lat, lng))
+    for pts in points.values():
+        pts.sort()
+    return points
+
+
+def links_fingerprint(points: list, scope: str) -> str:
+    """Stable hash of a meta's linked panos and scope."""
+    h = hashlib.sha1(scope.encode('utf-8'))
+    for panoid, lat, lng in points:
+        h.update(f"|{panoid}:{lat!r}:{lng!r}".encode('utf-8'))
+    return h.hexdigest()
+
+
+def convex_hull(coords: list) -> list:
+    """Andrew's monotone chain on (lat, lng) pairs, counter-clockwise."""
+    pts = sorted(set(coords))
+    if len(pts) <= 2:
+        return [list(p) for p in pts]
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return [list(p) for p in lower[:-1] + upper[:-1]]
+
+
+def compute_footprint(points: list, scope: str, with_hull: bool) -> dict:
+    """Build the footprint of a single meta from its linked panos."""
+    lats = [lat for _, lat, _ in points]
+    lngs = [lng for _, _, lng in points]
+    radius_km = get_distance_for_scope(scope)
+    footprint = {
+        "count": len(points),
+        "scope": scope,
+        "radiusKm": radius_km,
+        "centroid": [sum(lats) / len(lats), sum(lngs) / len(lngs)],
+        "bbox": None,
+    }
+    if with_hull:
+        footprint["hull"] = convex_hull(list(zip(lats, lngs)))
+    if not radius_km:
+        # Matched by name, not distance: the linked panos don't bound it
+        return footprint
+
+    min_lat, max_lat = min(lats), max(lats)
+    min_lng, max_lng = min(lngs), max(lngs)
+
+    # Expand by the scope radius; longitude degrees shrink towards the poles,
+    # so use the latitude closest to a pole for a conservative box.
+    dlat = radius_km / KM_PER_DEGREE
+    extreme_lat = min(89.9, max(abs(min_lat - dlat), abs(max_lat + dlat)))
+    dlng = radius_km / (KM_PER_DEGREE * math.cos(math.radians(extreme_lat)))
+
+    west, east = min_lng - dlng, max_lng + dlng
+    # A box reaching across the antimeridian or over a pole covers every
+    # longitude; the pre-filter must never reject a point inside the radius.
+    if west < -180 or east > 180 or min_lat - dlat <= -90 or max_lat + dlat >= 90:
+        west, east = -180.0, 180.0
+
+    footprint["bbox"] = [
+        max(-90.0, min_lat - dlat),
+        west,
+        min(90.0, max_lat + dlat),
+        east,
+    ]
+    return footprint
+
+
+def bbox_contains(bbox: list, lat: float, lng: float) -> bool:
+    """Cheap pre-filter: is (lat, lng) inside a footprint's bounding box (always, without one)?"""
+    if bbox is None:
+        return True
+    return bbox[0] <= lat <= bbox[2] and bbox[1] <= lng <= bbox[3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hull", action="store_true", help="also compute convex hulls")
+    parser.add_argument("--force", action="store_true", help="recompute every footprint")
+    args = parser.parse_args()
+
+    print("Loading locations.json and the locations log...")
+    locations = load_locations()
+    scopes = load_meta_scopes()
+    linked = collect_linked_points(locations)
+
+    previous = {}
+    if FOOTPRINTS_FILE_PATH.exists() and not args.force:
+        with open(FOOTPRINTS_FILE_PATH, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        # Footprints of an older version are computed differently; redo all of them
+        if stored.get('version') == FOOTPRINTS_VERSION:
+            previous = stored.get('metas', {})
+
+    footprints = {}
+    recomputed = reused = 0
+    for meta_id in sorted(linked):
+        points = linked[meta_id]
+        scope = scopes.get(meta_id, '')
+        fingerprint = links_fingerprint(points, scope)
+        old = previous.get(meta_id)
+        if old and old.get('fingerprint') == fingerprint and (not args.hull or 'hull' in old):
+            footprints[meta_id] = old
+            reused += 1
+            continue
+        footprint = compute_footprint(points, scope, args.hull)
+        footprint['fingerprint'] = fingerprint
+        footprints[meta_id] = footprint
+        recomputed += 1
+
+    removed = len(set(previous) - set(footprints))
+    print(f"Footprints: {recomputed} recomputed, {reused} unchanged, {removed} removed")
+
+    if recomputed == 0 and removed == 0 and previous:
+        print("Nothing changed, skipping write.")
+        return
+
+    print(f"Saving to {FOOTPRINTS_FILE_PATH.name}...")
+    with open(FOOTPRINTS_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump({"version": FOOTPRINTS_VERSION, "metas": footprints}, f, indent=2, ensure_ascii=False)
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,20 +14,19 @@ Scope indicates the geographic applicability of a meta:
 - (empty): Doesn't fit above categories (e.g., entire streets)
 """
 
-import json
 import re
 from pathlib import Path
 
+from plonkit_data import PlonkitData
+from rules import Rule, load_rule_plans, run_rules
+
 JSON_FILE_PATH = Path(__file__).parent.parent / "data" / "plonkit_data.json"
 
 
-def determine_scope(title: str, desc: str, note: str, section: str) -> str:
-    """Determine the scope for a meta based on its content."""
-    d = desc.lower()
-    t = title.lower()
-    n = note.lower() if note else ""
-    all_text = f"{d} {t} {n}"
-    
+# Each rule gets (title, desc, section, d, t) with d/t the lowercased
+# description/title and returns a scope or None to fall through.
+
+def _scope_unique_patterns(title, desc, section, d, t):
     # ============================================
     # UNIQUE - One-of-a-kind locations/landmarks
     # ============================================
@@ -42,12 +41,16 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
     for pattern in unique_patterns:
         if re.search(pattern, desc, re.I):
             return "Unique"
-    
+
+
+def _scope_landmarks(title, desc, section, d, t):
     # Specific single landmarks/monuments
     if any(x in d for x in ["monument", "statue", "memorial", "landmark", "fortress", "castle", "palace"]):
         if "across the country" not in d and "throughout" not in d:
             return "Unique"
-    
+
+
+def _scope_countrywide_patterns(title, desc, section, d, t):
     # ============================================
     # COUNTRYWIDE - National-level features
     # ============================================
@@ -56,19 +59,19 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
         r"(drives?|driving)\s+on\s+the\s+(left|right)",
         r"(left|right)[-\s]hand\s+traffic",
         r"(left|right)\s+side\s+of\s+the\s+road",
-        
+
         # License plates (national)
         r"(licence|license)\s+plate",
         r"plates?\s+(are|is)\s+(generally|typically|usually|commonly)",
-        
+
         # Language (national)
         r"official\s+language",
         r"the\s+language\s+(is|in)",
         r"(alphabet|script)\s+(is|uses?)",
-        
+
         # Currency
         r"(currency|money)\s+(is|in)",
-        
+
         # National patterns
         r"(can\s+be\s+)?found\s+(throughout|across|all\s+over)\s+(the\s+)?country",
         r"(everywhere|anywhere)\s+in\s+\w+",
@@ -78,11 +81,13 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
         r"all\s+(roads?|coverage)\s+in\s+\w+",
         r"\w+\s+(primarily|mainly|mostly)\s+uses?",
     ]
-    
+
     for pattern in countrywide_patterns:
         if re.search(pattern, desc, re.I):
             return "Countrywide"
-    
+
+
+def _scope_countrywide_keywords(title, desc, section, d, t):
     # Specific countrywide features
     countrywide_keywords = [
         "licence plate", "license plate",
@@ -97,18 +102,24 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
             # Check it's not region-specific
             if not any(x in d for x in ["north", "south", "east", "west", "region", "coast", "area"]):
                 return "Countrywide"
-    
+
+
+def _scope_road_lines(title, desc, section, d, t):
     # Road line colors are usually countrywide
     if ("road" in d or "roads" in d) and ("yellow" in d or "white" in d) and "line" in d:
         if "outer" in d or "center" in d or "centre" in d or "middle" in d:
             return "Countrywide"
-    
+
+
+def _scope_step1_identifiers(title, desc, section, d, t):
     # Step 1 items are often countrywide identifiers
     if section == "Step 1":
         # Features that distinguish the country
         if any(x in d for x in ["can be", "are used", "typically use", "primarily use", "generally"]):
             return "Countrywide"
-    
+
+
+def _scope_region_patterns(title, desc, section, d, t):
     # ============================================
     # REGION - Large area within country
     # ============================================
@@ -120,30 +131,36 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
         r"(north|south|east|west)\s+of\s+\w+",
         r"(coast|coastal)\s+(region|area)",
         r"panhandle",
-        
+
         # Named regions
         r"region\s+of\s+\w+",
         r"\w+\s+region",
         r"\w+\s+province",
         r"\w+\s+state\b",
     ]
-    
+
     for pattern in region_patterns:
         if re.search(pattern, desc, re.I):
             return "Region"
-    
+
+
+def _scope_longitude(title, desc, section, d, t):
     # ============================================
     # LONGITUDE - Longitude-based features
     # ============================================
     if "longitude" in d or "meridian" in d:
         return "Longitude"
-    
+
+
+def _scope_1000km(title, desc, section, d, t):
     # ============================================
     # 1000km - Very large areas
     # ============================================
     if re.search(r"(entire|whole)\s+(western|eastern|northern|southern)\s+half", d, re.I):
         return "1000km"
-    
+
+
+def _scope_city_area(title, desc, section, d, t):
     # ============================================
     # 100km - Large cities, mountain ranges
     # ============================================
@@ -151,12 +168,16 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
     if any(x in t.lower() for x in ["city", "capital"]):
         if "around" in d or "surrounding" in d or "region" in d:
             return "100km"
-    
+
+
+def _scope_mountain_range(title, desc, section, d, t):
     # Mountain ranges visible from far
     if "mountain" in d and ("range" in d or "visible from" in d or "can be seen" in d):
         if "everywhere" not in d and "across" not in d:
             return "100km"
-    
+
+
+def _scope_road_stretches(title, desc, section, d, t):
     # ============================================
     # 10km - Specific roads, town features
     # ============================================
@@ -171,7 +192,9 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
     for pattern in road_patterns:
         if re.search(pattern, desc, re.I):
             return "10km"
-    
+
+
+def _scope_town_features(title, desc, section, d, t):
     # Town/city specific features
     town_patterns = [
         r"in\s+[A-Z][a-z]+\s+(you|the|there|most)",
@@ -186,7 +209,9 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
             # Make sure it's about a specific place, not a general feature
             if any(x in d for x in ["recogni", "distinguish", "identify", "can be seen", "visible", "surround"]):
                 return "10km"
-    
+
+
+def _scope_town_in_title(title, desc, section, d, t):
     # Towns with specific features (from title)
     town_in_title = re.search(r"^([A-Z][a-z]+(?:[-\s][A-Z][a-z]+)?)\s", title)
     if town_in_title:
@@ -196,12 +221,16 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
             # Check if it's about a specific town
             if any(x in t.lower() for x in ["city", "town", "view", "grid", "hills", "ridge", "mountain", "feature"]):
                 return "10km"
-    
+
+
+def _scope_named_roads(title, desc, section, d, t):
     # Specific road coverage areas
     if re.search(r"\b[ABCDEFM]\d+\b", desc) or re.search(r"road\s+[ABCDEFM]\d+", d):
         # Named roads with specific descriptions
         return "10km"
-    
+
+
+def _scope_neighborhoods(title, desc, section, d, t):
     # ============================================
     # 1km - Specific neighborhoods, small areas
     # ============================================
@@ -213,7 +242,9 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
     for pattern in km1_patterns:
         if re.search(pattern, desc, re.I):
             return "1km"
-    
+
+
+def _scope_headers(title, desc, section, d, t):
     # ============================================
     # EMPTY - Features that don't fit categories
     # ============================================
@@ -225,43 +256,101 @@ def determine_scope(title: str, desc: str, note: str, section: str) -> str:
     for header in simple_headers:
         if d.strip() == header or t.strip() == header:
             return ""
-    
+
+
+def _scope_maps(title, desc, section, d, t):
     # Maps and coverage info (informational, no scope)
     if any(x in t.lower() for x in ["map", "header", "overview", "notes"]):
         return ""
-    
+
+
+def _scope_along_road(title, desc, section, d, t):
     # Generic features without specific location
     if re.search(r"(along|throughout)\s+the\s+road", d, re.I):
         return ""
-    
+
+
+def _scope_short_can_be_found(title, desc, section, d, t):
     # If the description mentions specific features but across too broad an area
     if "can be found" in d and len(d) < 100:
         return "Countrywide"
-    
+
+
+def _scope_section_fallback(title, desc, section, d, t):
     # ============================================
     # FALLBACKS based on step/section
     # ============================================
-    
+
     # Step 1 is usually country identification - default to Countrywide
     if section == "Step 1":
         return "Countrywide"
-    
+
     # Step 2 is usually region narrowing
     if section == "Step 2":
         return "Region"
-    
+
     # Step 3 is usually specific locations
     if section == "Step 3":
         return "10km"
-    
-    # Default: leave empty for unclear cases
-    return ""
+
+
+# (name, literals one of which must occur in the lowercased description or
+# title for the rule to match, rule). Regex literals are single words since
+# \s may match any whitespace.
+SCOPE_RULES = [
+    Rule("unique_patterns", ("only found", "unique to", "exclusively found", "the only", "one of a kind", "single"),
+         _scope_unique_patterns),
+    Rule("landmarks", ("monument", "statue", "memorial", "landmark", "fortress", "castle", "palace"), _scope_landmarks),
+    Rule("countrywide_patterns", ("driv", "traffic", "side", "plate", "official", "language", "alphabet", "script",
+                                  "currency", "money", "found", "everywhere", "anywhere", "all", "throughout",
+                                  "across", "use", "primarily", "mainly", "mostly"),
+         _scope_countrywide_patterns),
+    Rule("countrywide_keywords", ("licence plate", "license plate", "drives on the left", "drives on the right",
+                                  "left-hand traffic", "right-hand traffic", "official language", "the coverage in",
+                                  "google car", "pickup truck"),
+         _scope_countrywide_keywords),
+    Rule("road_lines", ("line",), _scope_road_lines),
+    Rule("step1_identifiers", ("can be", "are used", "typically use", "primarily use", "generally"),
+         _scope_step1_identifiers),
+    Rule("region_patterns", ("north", "south", "east", "west", "central", "coast", "panhandle", "region",
+                             "province", "state"),
+         _scope_region_patterns),
+    Rule("longitude", ("longitude", "meridian"), _scope_longitude),
+    Rule("1000km", ("half",), _scope_1000km),
+    Rule("city_area", ("city", "capital"), _scope_city_area),
+    Rule("mountain_range", ("mountain",), _scope_mountain_range),
+    Rule("road_stretches", ("between", "north", "south", "east", "west", "section", "stretch"), _scope_road_stretches),
+    Rule("town_features", ("recogni", "distinguish", "identify", "can be seen", "visible", "surround"),
+         _scope_town_features),
+    Rule("town_in_title", ("city", "town", "view", "grid", "hills", "ridge", "mountain", "feature"),
+         _scope_town_in_title),
+    Rule("named_roads", None, _scope_named_roads),
+    Rule("neighborhoods", ("downtown", "centre", "center", "cbd", "town", "city"), _scope_neighborhoods),
+    Rule("headers", ("landscape", "roads", "infrastructure", "car meta", "towns", "important notes", "overview"),
+         _scope_headers),
+    Rule("maps", ("map", "header", "overview", "notes"), _scope_maps),
+    Rule("along_road", ("road",), _scope_along_road),
+    Rule("short_can_be_found", ("can be found",), _scope_short_can_be_found),
+    Rule("section_fallback", None, _scope_section_fallback),
+]
+
+
+def evaluate_scope(title: str, desc: str, note: str, section: str, plan=None):
+    """Return (scope, name of the rule that produced it)."""
+    d = desc.lower()
+    t = title.lower()
+    # Rule literals are checked against description and title together
+    return run_rules(SCOPE_RULES, (title, desc, section, d, t), "", plan, f"{d}\n{t}")
+
+
+def determine_scope(title: str, desc: str, note: str, section: str, plan=None) -> str:
+    """Determine the scope for a meta based on its content."""
+    return evaluate_scope(title, desc, note, section, plan)[0]
 
 
 def main():
     print("Loading plonkit_data.json...")
-    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = PlonkitData(JSON_FILE_PATH)
     
     stats = {
         "Countrywide": 0,
@@ -275,9 +364,12 @@ def main():
         "": 0,
     }
     
+    plans = load_rule_plans("scope", SCOPE_RULES)
+
     count = 0
-    for country_data in data:
+    for country_data in data.countries:
         country_name = country_data.get('country', 'Unknown')
+        plan = plans.get(country_name)
         for meta in country_data.get('metas', []):
             # Process all metas (to update any that might have been missed)
             title = meta.get('title', '')
@@ -285,8 +377,8 @@ def main():
             note = meta.get('note', '')
             section = meta.get('section', '')
             
-            new_scope = determine_scope(title, desc, note, section)
-            meta['scope'] = new_scope
+            new_scope = determine_scope(title, desc, note, section, plan)
+            data.set(meta, 'scope', new_scope)
             stats[new_scope] += 1
             count += 1
             
@@ -303,9 +395,11 @@ def main():
     print(f"{'='*50}")
     print(f"Total: {count} metas processed\n")
     
-    print("Saving to plonkit_data.json...")
-    with open(JSON_FILE_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if data.dirty:
+        print(f"Saving {data.changed_metas} changed metas to plonkit_data.json...")
+        data.save()
+    else:
+        print("No changes, plonkit_data.json left untouched.")
     
     print("Done!")
 
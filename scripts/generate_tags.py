@@ -14,14 +14,77 @@ Available tags:
 - soil: ground, floor, terrain, road surface
 - camera: camera types, quality, generation, dirt/smudges on lens, camera angles/tilt
 - structures: silos, water towers, strange buildings, non-architecture landmarks
+
+Patterns that look at the rest of a line (`X(?!.*Y)`, `X.*Y`) are written
+as NotFollowedBy/FollowedBy instead of regexes. These find all matches of
+X and Y in one pass each and compare positions per line, so a meta is
+scanned in linear time however many times X occurs.
 """
 
-import json
+import argparse
 import re
+import sys
+import time
 from pathlib import Path
+from typing import NamedTuple
+
+from plonkit_data import PlonkitData
 
 JSON_FILE_PATH = Path(__file__).parent.parent / "data" / "plonkit_data.json"
 
+
+def _positions_per_line(matches, newlines: list, pos, keep_first: bool) -> dict:
+    """Map line number -> first/last match position; one forward pass."""
+    result = {}
+    line = 0
+    for m in matches:
+        p = pos(m)
+        # A position belongs to the line of the first newline at or after it
+        while line < len(newlines) and newlines[line] < p:
+            line += 1
+        if keep_first:
+            result.setdefault(line, p)
+        else:
+            result[line] = p
+    return result
+
+
+class NotFollowedBy(NamedTuple):
+    """Same as the regex `pattern(?!.*exclusion)`, without rescanning the line per match."""
+    pattern: str
+    exclusion: str
+    flags: int = re.I
+
+    def search(self, text: str, newlines: list) -> bool:
+        # Only the last match per line matters: its rest of line is the shortest
+        ends = _positions_per_line(re.finditer(self.pattern, text, self.flags), newlines, lambda m: m.end(), False)
+        if not ends:
+            return False
+        excluded = _positions_per_line(re.finditer(self.exclusion, text, self.flags), newlines, lambda m: m.start(), False)
+        return any(excluded.get(line, -1) < end for line, end in ends.items())
+
+
+class FollowedBy(NamedTuple):
+    """Same as the regex `pattern.*then`, without rescanning the line per match."""
+    pattern: str
+    then: str
+    flags: int = re.I
+
+    def search(self, text: str, newlines: list) -> bool:
+        # First match of `pattern` and last match of `then` per line decide it
+        ends = _positions_per_line(re.finditer(self.pattern, text, self.flags), newlines, lambda m: m.end(), True)
+        if not ends:
+            return False
+        starts = _positions_per_line(re.finditer(self.then, text, self.flags), newlines, lambda m: m.start(), False)
+        return any(starts.get(line, -1) >= end for line, end in ends.items())
+
+
+def pattern_matches(pattern, text: str, newlines: list) -> bool:
+    """Match a TAG_PATTERNS entry (regex string, NotFollowedBy or FollowedBy)."""
+    if isinstance(pattern, str):
+        return re.search(pattern, text, re.I) is not None
+    return pattern.search(text, newlines)
+
 # Tag detection patterns
 TAG_PATTERNS = {
     "plants": [
@@ -62,7 +125,7 @@ TAG_PATTERNS = {
     ],
     "plates": [
         r"\b(licence\s+plate|license\s+plate|number\s+plate)\b",
-        r"\b(plate|plates)\b(?!.*tectonic)",  # Avoid "tectonic plates"
+        NotFollowedBy(r"\b(plate|plates)\b", r"tectonic"),  # Avoid "tectonic plates"
         r"\b(vehicle\s+registration|car\s+registration)\b",
         r"\b(yellow\s+plate|white\s+plate|blue\s+plate|red\s+plate)\b",
     ],
@@ -84,12 +147,12 @@ TAG_PATTERNS = {
         r"\b(tower|towers|church|mosque|temple|cathedral)\b",
         r"\b(colonial|modern|traditional|historic)\b",
         r"\b(fence|fences|wall|walls|gate|gates)\b",
-        r"\b(style|styles)\b.*\b(building|house|architecture)\b",
+        FollowedBy(r"\b(style|styles)\b", r"\b(building|house|architecture)\b"),
     ],
     "soil": [
         # Physical dirt on surfaces (Ground/Floor)
         r"\b(soil|terrain|ground|floor)\b",
-        r"\b(dirt|dirty|dust|dusty|mud|muddy|grime|grimy)\b(?!(.*\b(camera|lens)\b))",
+        NotFollowedBy(r"\b(dirt|dirty|dust|dusty|mud|muddy|grime|grimy)\b", r"\b(camera|lens)\b"),
         r"\b(roof\s+dust|dirty\s+roof|dusty\s+roof|dirt\s+on\s+roof)\b",
         r"\b(dirt\s+road|dirt\s+track)\b",
         r"\b(muddy|dusty|sandy|rocky)\s+road\b",
@@ -110,7 +173,7 @@ TAG_PATTERNS = {
         # Art / Type / Generation
         r"\b(camera|cameras|smallcam|lowcam|shitcam|dashcam)\b",
         # Generation (only if not about vehicle specifically)
-        r"\b(gen(?:eration)?\s*[1-4])\b(?!.*\b(motorcycle|motorbike|scooter|car|pickup)\b)",
+        NotFollowedBy(r"\b(gen(?:eration)?\s*[1-4])\b", r"\b(motorcycle|motorbike|scooter|car|pickup)\b"),
         r"\b(gen(?:eration)?\s*[1-4]|shitcam|smallcam|lowcam)\s+coverage",
         r"\b(copyright|watermark)\b",
         r"\b(panorama|360|fisheye)\b",
@@ -148,20 +211,36 @@ TAG_PATTERNS = {
 }
 
 
+VEHICLE_BEFORE_BLUR = FollowedBy(r"\b(car|roof|motorbike|motorcycle|scooter)\b", r"\b(blur|blurred|unblurred)\b", 0)
+BLUR_BEFORE_VEHICLE = FollowedBy(r"\b(blur|blurred|unblurred)\b", r"\b(car|roof|motorbike|motorcycle|scooter)\b", 0)
+
+
+def normalize_text(title: str, desc: str, note: str) -> tuple:
+    """Lowercased combined text and its newline positions, as used by the tag patterns."""
+    all_text = f"{title} {desc} {note}".lower()
+    return all_text, [m.start() for m in re.finditer("\n", all_text)]
+
+
 def determine_tags(title: str, desc: str, note: str) -> list:
     """Determine tags for a meta based on its content."""
-    all_text = f"{title} {desc} {note}".lower()
+    return tags_for_text(*normalize_text(title, desc, note))
+
+
+def tags_for_text(all_text: str, newlines: list, tag_patterns: dict = None) -> list:
+    """Determine tags for pre-normalized text (see normalize_text)."""
+    if tag_patterns is None:
+        tag_patterns = TAG_PATTERNS
     tags = []
     
     # Pre-check for exclusions to handle the "blur" cases better without complex regex
-    is_vehicle_blur = re.search(r"\b(car|roof|motorbike|motorcycle|scooter)\b.*\b(blur|blurred|unblurred)\b", all_text) or \
-                      re.search(r"\b(blur|blurred|unblurred)\b.*\b(car|roof|motorbike|motorcycle|scooter)\b", all_text)
+    is_vehicle_blur = VEHICLE_BEFORE_BLUR.search(all_text, newlines) or \
+                      BLUR_BEFORE_VEHICLE.search(all_text, newlines)
 
-    for tag, patterns in TAG_PATTERNS.items():
+    for tag, patterns in tag_patterns.items():
         for pattern in patterns:
-            if re.search(pattern, all_text, re.I):
+            if pattern_matches(pattern, all_text, newlines):
                 # Manual exclusion for blur if it's about a vehicle
-                if tag == "camera" and "blur" in pattern and is_vehicle_blur:
+                if tag == "camera" and isinstance(pattern, str) and "blur" in pattern and is_vehicle_blur:
                     continue
                 
                 if tag not in tags:
@@ -172,23 +251,32 @@ def determine_tags(title: str, desc: str, note: str) -> list:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate tags for all metas in plonkit_data.json.")
+    parser.add_argument("--time-budget-ms", type=float, default=None,
+                        help="log metas whose tagging takes longer than this")
+    args = parser.parse_args()
+
     print("Loading plonkit_data.json...")
-    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    data = PlonkitData(JSON_FILE_PATH)
     
     stats = {tag: 0 for tag in TAG_PATTERNS.keys()}
     stats["(none)"] = 0
     
     count = 0
-    for country_data in data:
+    for country_data in data.countries:
         country_name = country_data.get('country', 'Unknown')
         for meta in country_data.get('metas', []):
             title = meta.get('title', '')
             desc = meta.get('description', '')
             note = meta.get('note', '')
             
+            start = time.perf_counter()
             new_tags = determine_tags(title, desc, note)
-            meta['tags'] = new_tags
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if args.time_budget_ms is not None and elapsed_ms > args.time_budget_ms:
+                print(f"[slow] {meta.get('id')} took {elapsed_ms:.2f} ms "
+                      f"({len(title) + len(desc) + len(note)} chars)", file=sys.stderr)
+            data.set(meta, 'tags', new_tags)
             
             if new_tags:
                 for tag in new_tags:
@@ -210,9 +298,11 @@ def main():
     print(f"{'='*50}")
     print(f"Total: {count} metas processed\n")
     
-    print("Saving to plonkit_data.json...")
-    with open(JSON_FILE_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if data.dirty:
+        print(f"Saving {data.changed_metas} changed metas to plonkit_data.json...")
+        data.save()
+    else:
+        print("No changes, plonkit_data.json left untouched.")
     
     print("Done!")
 
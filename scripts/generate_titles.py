@@ -2,25 +2,30 @@
 """
 Generate AI-style titles for all empty entries.
 
-This script analyzes each description and generates meaningful, 
+This script analyzes each description and generates meaningful,
 concise titles following GeoGuessr meta conventions.
+
+Titles come from an ordered list of rules (TITLE_RULES); the first rule
+returning a title wins. See rules.py for per-country rule plans.
 """
 
-import json
 import re
 from pathlib import Path
 
+from plonkit_data import PlonkitData
+from rules import Rule, load_rule_plans, run_rules
+
 JSON_FILE_PATH = Path(__file__).parent.parent / "data" / "plonkit_data.json"
 
 
-def generate_title(desc: str, country: str) -> str:
-    """Generate a meaningful title from description content."""
-    d = desc.lower()
-    
+# Each rule gets (desc, d, country) with d = desc.lower() and returns a
+# title or None to fall through to the next rule.
+
+def _title_headers(desc, d, country):
     # Header entries - simple section headers
     simple_headers = {
         "landscape and vegetation": "Landscape Header",
-        "roads": "Roads Header", 
+        "roads": "Roads Header",
         "infrastructure": "Infrastructure Header",
         "car meta": "Car Meta Header",
         "towns": "Towns Header",
@@ -35,18 +40,22 @@ def generate_title(desc: str, country: str) -> str:
         "ev-01": "EV-01 Road",
         "important notes": "Road Notes",
     }
-    
+
     for header, title in simple_headers.items():
         if d.strip() == header or d.startswith(header + "\n") or d.startswith(header + ":"):
             return title
-    
+
+
+def _title_road_overview(desc, d, country):
     # Road sections with "Includes X tips"
     if "includes" in d and "tips" in d:
         road_match = re.search(r'\b(em-?\d+|eo-?\d+|ev-?\d+|a\d+|m\d+|e\d+|p\d+|r\d+)\b', d, re.I)
         if road_match:
             return f"{road_match.group(1).upper()} Overview"
         return "Road Overview"
-    
+
+
+def _title_plates(desc, d, country):
     # License plates
     if "licence plate" in d or "license plate" in d:
         if "white" in d and "blue" in d:
@@ -60,7 +69,9 @@ def generate_title(desc: str, country: str) -> str:
         if "code" in d:
             return "Plate Region Codes"
         return "License Plates"
-    
+
+
+def _title_script(desc, d, country):
     # Script/Language
     if "cyrillic" in d and "latin" in d:
         return "Dual Script Alphabet"
@@ -72,7 +83,9 @@ def generate_title(desc: str, country: str) -> str:
         return "Arabic Language"
     if "alphabet" in d or ("language" in d and len(d) < 200):
         return "Language Features"
-    
+
+
+def _title_camera_generation(desc, d, country):
     # Street view car/camera
     if "shitcam" in d:
         return "Shitcam Coverage"
@@ -80,6 +93,9 @@ def generate_title(desc: str, country: str) -> str:
         return "Gen 2 Coverage"
     if "generation 3" in d or "gen 3" in d:
         return "Gen 3 Coverage"
+
+
+def _title_car_meta(desc, d, country):
     if "pickup" in d and "truck" in d:
         if "white" in d:
             return "White Pickup Meta"
@@ -98,11 +114,15 @@ def generate_title(desc: str, country: str) -> str:
         return "Dusty Roof Meta"
     if "line of dirt" in d:
         return "Dirt Line Meta"
-    
+
+
+def _title_crossings(desc, d, country):
     # Crossings
     if "pedestrian crossing" in d or "crosswalk" in d or "crossing" in d and "stripe" in d:
         return "Striped Crosswalks"
-    
+
+
+def _title_signs(desc, d, country):
     # Signs
     if "street sign" in d:
         if "blue" in d:
@@ -114,7 +134,9 @@ def generate_title(desc: str, country: str) -> str:
         return "Street Signs"
     if "qr code" in d:
         return "QR Code Signs"
-    
+
+
+def _title_bollards(desc, d, country):
     # Bollards
     if "bollard" in d:
         if "90" in desc or "angle" in d:
@@ -122,7 +144,9 @@ def generate_title(desc: str, country: str) -> str:
         if "black" in d and "white" in d:
             return "Striped Bollards"
         return "Road Bollards"
-    
+
+
+def _title_chevrons(desc, d, country):
     # Chevrons
     if "chevron" in d:
         if "yellow" in d and "black" in d:
@@ -130,7 +154,9 @@ def generate_title(desc: str, country: str) -> str:
         if "red" in d and "white" in d:
             return "Red-White Chevrons"
         return "Road Chevrons"
-    
+
+
+def _title_trees(desc, d, country):
     # Trees
     if "tree trunk" in d or ("tree" in d and "painted" in d and "white" in d):
         return "White-Painted Trees"
@@ -140,19 +166,25 @@ def generate_title(desc: str, country: str) -> str:
         return "Pine Forests"
     if "spruce" in d:
         return "Spruce Forests"
-    
+
+
+def _title_gas_pipes(desc, d, country):
     # Gas/pipes
     if "gas pipe" in d:
         if "yellow box" in d:
             return "Yellow Gas Boxes"
         return "Urban Gas Pipes"
-    
+
+
+def _title_ornamental(desc, d, country):
     # Ornamental
     if "koshkar-muiz" in d:
         return "Koshkar-Muiz Pattern"
     if "entrance arc" in d:
         return "Town Entrance Arcs"
-    
+
+
+def _title_coverage(desc, d, country):
     # Coverage/maps
     if "coverage" in d and "limited" in d:
         return "Limited Coverage Map"
@@ -162,18 +194,26 @@ def generate_title(desc: str, country: str) -> str:
         return "Driving Directions"
     if "area code" in d:
         return "Area Code Map"
-    
+
+
+def _title_steppe(desc, d, country):
     # Terrain/Landscape
     if "steppe" in d:
         if "grassy" in d or "green" in d:
             return "Green Steppes"
         if "dry" in d:
-            return "Dry Steppes" 
+            return "Dry Steppes"
         return "Steppe Landscape"
+
+
+def _title_desert(desc, d, country):
     if "desert" in d:
         if "sandy" in d:
             return "Sandy Desert"
         return "Desert Landscape"
+
+
+def _title_mountains(desc, d, country):
     if "mountain" in d:
         if "snow" in d or "snow-capped" in d:
             return "Snow-Capped Mountains"
@@ -184,6 +224,9 @@ def generate_title(desc: str, country: str) -> str:
         if "tian shan" in d:
             return "Tian Shan Range"
         return "Mountain Terrain"
+
+
+def _title_hills(desc, d, country):
     if "rolling hill" in d:
         return "Rolling Hills"
     if "hilly" in d and "forested" in d:
@@ -192,19 +235,27 @@ def generate_title(desc: str, country: str) -> str:
         if "dry" in d:
             return "Dry Hills"
         return "Hilly Terrain"
+
+
+def _title_plains(desc, d, country):
     if "flat" in d and ("agricultural" in d or "agriculture" in d):
         return "Flat Agricultural Land"
     if "flat" in d and "empty" in d:
         return "Open Flat Landscape"
     if "grassy" in d and "plain" in d:
         return "Grassy Plains"
+
+
+def _title_seasons(desc, d, country):
     if "fall colour" in d or "fall color" in d or "autumn" in d:
         return "Fall Colors"
     if "snow coverage" in d or ("snow" in d and "coverage" in d):
         return "Snow Coverage"
     if "forest fire" in d or "hazy" in d and "fire" in d:
         return "Forest Fire Haze"
-    
+
+
+def _title_named_road(desc, d, country):
     # Roads by name
     road_match = re.search(r'\b(e-?\d+|m-?\d+|a-?\d+|p-?\d+|r-?\d+|em-?\d+|eo-?\d+)\b', d, re.I)
     if road_match:
@@ -218,7 +269,9 @@ def generate_title(desc: str, country: str) -> str:
         if "unpaved" in d:
             return f"{road} Unpaved"
         return f"{road} Road Features"
-    
+
+
+def _title_infrastructure(desc, d, country):
     # Infrastructure
     if "pole paint" in d or ("pole" in d and "paint" in d):
         return "Painted Poles"
@@ -234,7 +287,9 @@ def generate_title(desc: str, country: str) -> str:
         if "grey" in d or "thin" in d:
             return "Grey Street Lamps"
         return "Street Lamps"
-    
+
+
+def _title_cities(desc, d, country):
     # Towns/cities
     if "capital" in d:
         return "Capital City Features"
@@ -244,7 +299,9 @@ def generate_title(desc: str, country: str) -> str:
         if city_match and city_match.group(1).lower() not in ['the', 'you', 'this', 'that']:
             return f"{city_match.group(1)} City"
         return "City Features"
-    
+
+
+def _title_lakes(desc, d, country):
     # Reservoirs/lakes
     if "reservoir" in d:
         return "Reservoir Views"
@@ -252,13 +309,17 @@ def generate_title(desc: str, country: str) -> str:
         if "issyk" in d:
             return "Issyk Kul Lake"
         return "Lake Views"
-    
+
+
+def _title_valleys(desc, d, country):
     # Valley/gorge
     if "gorge" in d or "canyon" in d:
         return "River Gorge"
     if "valley" in d:
         return "Valley Landscape"
-    
+
+
+def _title_weather(desc, d, country):
     # Weather/conditions
     if "sunset" in d:
         return "Sunset Coverage"
@@ -268,43 +329,59 @@ def generate_title(desc: str, country: str) -> str:
         return "Sunny Coverage"
     if "snowy" in d and "town" in d:
         return "Snowy Town"
-    
+
+
+def _title_national_park(desc, d, country):
     # National parks
     if "national park" in d:
         park_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+national\s+park', desc, re.I)
         if park_match:
             return f"{park_match.group(1)} Park"
         return "National Park"
-    
+
+
+def _title_university(desc, d, country):
     # Universities
     if "universit" in d:
         return "University Campus"
-    
+
+
+def _title_bridge(desc, d, country):
     # Bridges
     if "bridge" in d:
         bridge_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+bridge', desc, re.I)
         if bridge_match:
             return f"{bridge_match.group(1)} Bridge"
         return "Bridge Features"
-    
+
+
+def _title_mediterranean(desc, d, country):
     # Mediterranean
     if "mediterranean" in d:
         return "Mediterranean Landscape"
-    
+
+
+def _title_casino(desc, d, country):
     # Casinos/gambling
     if "casino" in d or "gambling" in d:
         return "Casino District"
-    
+
+
+def _title_portuguese(desc, d, country):
     # Portuguese/colonial
     if "portuguese" in d:
         return "Portuguese Influence"
-    
+
+
+def _title_architecture(desc, d, country):
     # Architecture
     if "architecture" in d or "building" in d and "stone" in d:
         return "Local Architecture"
     if "sandstone" in d:
         return "Sandstone Buildings"
-    
+
+
+def _title_poles(desc, d, country):
     # Poles
     if "pole" in d:
         if "concrete" in d:
@@ -314,7 +391,9 @@ def generate_title(desc: str, country: str) -> str:
         if "metallic" in d or "metal" in d:
             return "Metal Poles"
         return "Utility Poles"
-    
+
+
+def _title_road_lines(desc, d, country):
     # Road lines
     if "road line" in d or "road marking" in d:
         if "yellow" in d:
@@ -322,19 +401,25 @@ def generate_title(desc: str, country: str) -> str:
         if "white" in d:
             return "White Road Lines"
         return "Road Markings"
-    
+
+
+def _title_vegetation(desc, d, country):
     # Vegetation
     if "vegetation" in d and "lot of" in d:
         return "Dense Vegetation"
     if "agricultural" in d or "agriculture" in d:
         return "Agricultural Area"
-    
+
+
+def _title_coastal(desc, d, country):
     # Coastal
     if "coastal" in d or "coast" in d or "ocean" in d:
         return "Coastal Coverage"
     if "promenade" in d:
         return "Coastal Promenade"
-    
+
+
+def _title_median(desc, d, country):
     # Median types
     if "median" in d:
         if "grassy" in d:
@@ -342,26 +427,32 @@ def generate_title(desc: str, country: str) -> str:
         if "concrete" in d:
             return "Concrete Barriers"
         return "Road Median"
-    
+
+
+def _title_historical(desc, d, country):
     # Ancient/historical
     if "ancient" in d or "historical" in d or "ruins" in d:
         return "Historical Site"
     if "fortress" in d:
         return "Historic Fortress"
-    
-    # Guardrails  
+
+
+def _title_guardrails(desc, d, country):
+    # Guardrails
     if "guardrail" in d:
         if "red" in d:
             return "Red Guardrails"
         return "Road Guardrails"
-    
+
+
+def _title_town_markers(desc, d, country):
     # Town-specific markers
     city_patterns = [
         (r"in\s+([A-Z][a-z]+(?:-[A-Z][a-z]+)?)", "city"),
         (r"([A-Z][a-z]+(?:-[A-Z][a-z]+)?)\s+is\s+", "city"),
         (r"around\s+([A-Z][a-z]+(?:-[A-Z][a-z]+)?)", "city"),
     ]
-    
+
     for pattern, ptype in city_patterns:
         match = re.search(pattern, desc)
         if match:
@@ -375,17 +466,23 @@ def generate_title(desc: str, country: str) -> str:
                     return f"{city} Mountains"
                 if len(d) < 200:
                     return f"{city} Features"
-    
+
+
+def _title_driving_side(desc, d, country):
     # Left side driving
     if "left side" in d and "road" in d:
         return "Left-Hand Traffic"
     if "right side" in d and "road" in d:
         return "Right-Hand Traffic"
-    
+
+
+def _title_diverse(desc, d, country):
     # Diverse landscape
     if "diverse" in d and ("landscape" in d or "country" in d):
         return "Diverse Landscapes"
-    
+
+
+def _title_similarities(desc, d, country):
     # Similar to other country
     if "similar to" in d:
         if "russia" in d:
@@ -394,11 +491,15 @@ def generate_title(desc: str, country: str) -> str:
             return "Indian Similarities"
         if "turkey" in d or "turkish" in d:
             return "Turkish Similarities"
-    
+
+
+def _title_unique(desc, d, country):
     # Generic fallbacks
     if "only" in d and country in d:
         return "Unique Feature"
-    
+
+
+def _title_first_words(desc, d, country):
     # Extract first meaningful phrase for very generic entries
     words = desc.split()
     if len(words) >= 3:
@@ -412,35 +513,101 @@ def generate_title(desc: str, country: str) -> str:
                     break
         if meaningful:
             return ' '.join(meaningful)
-    
-    return "Regional Feature"
+
+
+# (name, literals one of which must occur in desc.lower() for the rule to match, rule)
+TITLE_RULES = [
+    Rule("headers", ("landscape and vegetation", "roads", "infrastructure", "car meta", "towns",
+                     "em-04", "em-11", "em-09", "em-10", "eo-01", "eo-02", "ev-01", "important notes"),
+         _title_headers),
+    Rule("road_overview", ("includes",), _title_road_overview),
+    Rule("plates", ("licence plate", "license plate"), _title_plates),
+    Rule("script", ("cyrillic", "devanagari", "arabic", "alphabet", "language"), _title_script),
+    Rule("camera_generation", ("shitcam", "gen 2", "generation 2", "gen 3", "generation 3"), _title_camera_generation),
+    Rule("car_meta", ("pickup", "wire", "dirty", "smudge", "dot", "coating", "line of dirt"), _title_car_meta),
+    Rule("crossings", ("crosswalk", "crossing"), _title_crossings),
+    Rule("signs", ("street sign", "qr code"), _title_signs),
+    Rule("bollards", ("bollard",), _title_bollards),
+    Rule("chevrons", ("chevron",), _title_chevrons),
+    Rule("trees", ("tree", "birch", "pine", "spruce"), _title_trees),
+    Rule("gas_pipes", ("gas pipe",), _title_gas_pipes),
+    Rule("ornamental", ("koshkar-muiz", "entrance arc"), _title_ornamental),
+    Rule("coverage", ("coverage", "driving direction", "area code"), _title_coverage),
+    Rule("steppe", ("steppe",), _title_steppe),
+    Rule("desert", ("desert",), _title_desert),
+    Rule("mountains", ("mountain",), _title_mountains),
+    Rule("hills", ("rolling hill", "hilly"), _title_hills),
+    Rule("plains", ("flat", "grassy"), _title_plains),
+    Rule("seasons", ("fall colour", "fall color", "autumn", "snow", "fire"), _title_seasons),
+    Rule("named_road", None, _title_named_road),
+    Rule("infrastructure", ("pole", "bus", "lamp"), _title_infrastructure),
+    Rule("cities", ("capital", "recogni"), _title_cities),
+    Rule("lakes", ("reservoir", "lake"), _title_lakes),
+    Rule("valleys", ("gorge", "canyon", "valley"), _title_valleys),
+    Rule("weather", ("sunset", "overcast", "sunny", "snowy"), _title_weather),
+    Rule("national_park", ("national park",), _title_national_park),
+    Rule("university", ("universit",), _title_university),
+    Rule("bridge", ("bridge",), _title_bridge),
+    Rule("mediterranean", ("mediterranean",), _title_mediterranean),
+    Rule("casino", ("casino", "gambling"), _title_casino),
+    Rule("portuguese", ("portuguese",), _title_portuguese),
+    Rule("architecture", ("architecture", "building", "sandstone"), _title_architecture),
+    Rule("poles", ("pole",), _title_poles),
+    Rule("road_lines", ("road line", "road marking"), _title_road_lines),
+    Rule("vegetation", ("vegetation", "agricultur"), _title_vegetation),
+    Rule("coastal", ("coast", "ocean", "promenade"), _title_coastal),
+    Rule("median", ("median",), _title_median),
+    Rule("historical", ("ancient", "historical", "ruins", "fortress"), _title_historical),
+    Rule("guardrails", ("guardrail",), _title_guardrails),
+    Rule("town_markers", None, _title_town_markers),
+    Rule("driving_side", ("left side", "right side"), _title_driving_side),
+    Rule("diverse", ("diverse",), _title_diverse),
+    Rule("similarities", ("similar to",), _title_similarities),
+    Rule("unique", ("only",), _title_unique),
+    Rule("first_words", None, _title_first_words),
+]
+
+
+def evaluate_title(desc: str, country: str, plan=None):
+    """Return (title, name of the rule that produced it)."""
+    d = desc.lower()
+    return run_rules(TITLE_RULES, (desc, d, country), "Regional Feature", plan, d)
+
+
+def generate_title(desc: str, country: str, plan=None) -> str:
+    """Generate a meaningful title from description content."""
+    return evaluate_title(desc, country, plan)[0]
 
 
 def main():
     print("Loading plonkit_data.json...")
-    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
+    data = PlonkitData(JSON_FILE_PATH)
+
+    plans = load_rule_plans("title", TITLE_RULES)
+
     count = 0
-    for country_data in data:
+    for country_data in data.countries:
         country_name = country_data.get('country', 'Unknown')
+        plan = plans.get(country_name)
         for meta in country_data.get('metas', []):
             if meta.get('title', '') == '':
                 desc = meta.get('description', '')
                 if desc:
-                    new_title = generate_title(desc, country_name)
-                    meta['title'] = new_title
+                    new_title = generate_title(desc, country_name, plan)
+                    data.set(meta, 'title', new_title)
                     count += 1
                     if count <= 100:
                         print(f"[{country_name}] {new_title}")
                         print(f"  → {desc[:70]}...")
-    
+
     print(f"\nGenerated {count} titles")
-    
-    print("Saving to plonkit_data.json...")
-    with open(JSON_FILE_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    
+
+    if data.dirty:
+        print(f"Saving {data.changed_metas} changed metas to plonkit_data.json...")
+        data.save()
+    else:
+        print("No changes, plonkit_data.json left untouched.")
+
     print("Done!")
 
 
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Perceptual-hash index over meta images for visual duplicate lookup.
+
+Computes a 64-bit dHash and pHash for every image in a local directory
+(by default the thumbnails written by mirror_images.py), using a process
+pool and a batched NumPy DCT. Hashes are cached per file by size and
+mtime, so only new or changed images are hashed again. Lookups go
+through a BK-tree over Hamming distance.
+
+    python scripts/image_hashes.py build
+    python scripts/image_hashes.py query meta_1769520862728_7q7ph -k 6
+    python scripts/image_hashes.py clusters -k 4
+
+Images map to meta ids through `localImageUrl` in plonkit_data.json, or
+through the file name itself (`<meta id>.<ext>`).
+Requires NumPy and Pillow (pip install numpy Pillow).
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:
+    np = Image = None
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+JSON_FILE_PATH = DATA_DIR / "plonkit_data.json"
+IMAGES_DIR = DATA_DIR / "thumbs"
+INDEX_FILE_NAME = "image_hashes.json"
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp"}
+HASH_KINDS = ("dhash", "phash")
+BATCH_SIZE = 64
+PHASH_SIZE = 32
+
+
+def _dct_matrix(n: int):
+    """Orthonormal DCT-II matrix."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+
+def _pack_bits(bits) -> list:
+    """Pack rows of 64 booleans into Python ints."""
+    weights = 1 << np.arange(63, -1, -1, dtype=np.uint64)
+    return [int(v) for v in (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)]
+
+
+def hash_batch(paths: list) -> list:
+    """Return [(path, dhash, phash)] for a batch; unreadable images get None hashes."""
+    dh_rows, ph_rows, ok = [], [], []
+    for path in paths:
+        try:
+            with Image.open(path) as img:
+                gray = img.convert("L")
+                dh_rows.append(np.asarray(gray.resize((9, 8), Image.LANCZOS), dtype=np.float64))
+                ph_rows.append(np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS), dtype=np.float64))
+                ok.append(path)
+        except Exception:  # Pillow raises a variety of errors on broken images
+            continue
+    results = [(path, None, None) for path in paths if path not in ok]
+    if not ok:
+        return results
+
+    # dHash: is each pixel brighter than its right neighbour?
+    dh = np.stack(dh_rows)
+    dhashes = _pack_bits((dh[:, :, 1:] > dh[:, :, :-1]).reshape(len(ok), 64))
+
+    # pHash: top-left 8x8 DCT coefficients against their median (without DC)
+    dct = _dct_matrix(PHASH_SIZE)
+    coeffs = np.einsum('ij,njk,lk->nil', dct, np.stack(ph_rows), dct)[:, :8, :8].reshape(len(ok), 64)
+    medians = np.median(coeffs[:, 1:], axis=1, keepdims=True)
+    phashes = _pack_bits(coeffs > medians)
+
+    return results + list(zip(ok, dhashes, phashes))
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over Hamming distance of 64-bit hashes."""
+
+    def __init__(self):
+        self._root = None  # [hash, [keys], {distance: child}]
+
+    def add(self, value: int, key):
+        if self._root is None:
+            self._root = [value, [key], {}]
+            return
+        node = self._root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].append(key)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, [key], {}]
+                return
+            node = child
+
+    def search(self, value: int, k: int) -> list:
+        """[(distance, key)] for every stored hash within distance k."""
+        found = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(value, node[0])
+            if d <= k:
+                found.extend((d, key) for key in node[1])
+            for dist, child in node[2].items():
+                if d - k <= dist <= d + k:
+                    stack.append(child)
+        return sorted(found)
+
+
+def image_meta_ids(images_dir: Path) -> dict:
+    """Map image file name -> list of meta ids using localImageUrl."""
+    by_file = defaultdict(list)
+    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
+        for country_data in json.load(f):
+            for meta in country_data.get('metas', []):
+                if meta.get('localImageUrl'):
+                    by_file[Path(meta['localImageUrl']).name].append(meta['id'])
+    return by_file
+
+
+def update_index(images_dir: Path, workers: int) -> dict:
+    """Hash new or changed images in `images_dir`; returns the index {file: entry}."""
+    index_path = images_dir / INDEX_FILE_NAME
+    index = {}
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+    files = {p.name: p for p in images_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES}
+    todo = []
+    for name, path in files.items():
+        st = path.stat()
+        entry = index.get(name)
+        if not entry or entry['size'] != st.st_size or entry['mtime'] != st.st_mtime_ns:
+            todo.append(path)
+    removed = set(index) - set(files)
+    for name in removed:
+        del index[name]
+
+    if todo:
+        batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in executor.map(hash_batch, batches):
+                for path, dhash, phash in batch:
+                    st = path.stat()
+                    index[path.name] = {"size": st.st_size, "mtime": st.st_mtime_ns,
+                                        "dhash": f"{dhash:016x}" if dhash is not None else None,
+                                        "phash": f"{phash:016x}" if phash is not None else None}
+
+    print(f"Hashed {len(todo)} new or changed images, {len(files) - len(todo)} cached, {len(removed)} removed")
+    if todo or removed:
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+    return index
+
+
+def build_tree(index: dict, kind: str, images_dir: Path) -> tuple:
+    """BK-tree of meta ids keyed by hash; also returns meta id -> hash."""
+    by_file = image_meta_ids(images_dir)
+    tree = BKTree()
+    hashes = {}
+    for name, entry in index.items():
+        if entry.get(kind) is None:
+            continue
+        value = int(entry[kind], 16)
+        for meta_id in by_file.get(name) or [Path(name).stem]:
+            tree.add(value, meta_id)
+            hashes[meta_id] = value
+    return tree, hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perceptual-hash index over meta images.")
+    parser.add_argument("--dir", type=Path, default=IMAGES_DIR, help="image directory (default: data/thumbs)")
+    parser.add_argument("--hash", choices=HASH_KINDS, default="phash", help="hash used for lookups")
+    parser.add_argument("--workers", type=int, default=None, help="hashing processes (default: CPU count)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="hash new or changed images")
+    query = sub.add_parser("query", help="images within distance k of a meta id or image file")
+    query.add_argument("target")
+    query.add_argument("-k", type=int, default=6)
+    clusters = sub.add_parser("clusters", help="dump duplicate clusters for the whole corpus")
+    clusters.add_argument("-k", type=int, default=4)
+    args = parser.parse_args()
+
+    if np is None:
+        print("NumPy and Pillow are required: pip install numpy Pillow", file=sys.stderr)
+        sys.exit(1)
+    if not args.dir.is_dir():
+        print(f"Image directory {args.dir} not found (run mirror_images.py first)", file=sys.stderr)
+        sys.exit(1)
+
+    index = update_index(args.dir, args.workers)
+    if args.command == "build":
+        print("Done!")
+        return
+
+    tree, hashes = build_tree(index, args.hash, args.dir)
+
+    if args.command == "query":
+        if args.target in hashes:
+            value = hashes[args.target]
+        else:
+            path = Path(args.target)
+            _, dhash, phash = hash_batch([path])[0] if path.exists() else (None, None, None)
+            value = dhash if args.hash == "dhash" else phash
+            if value is None:
+                print(f"Unknown meta id or unreadable image: {args.target}", file=sys.stderr)
+                sys.exit(1)
+        start = time.perf_counter()
+        matches = tree.search(value, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for d, meta_id in matches:
+            if meta_id != args.target:
+                print(f"  {d:2}  {meta_id}")
+        print(f"{len(matches)} matches within {args.k} in {elapsed:.2f} ms")
+        return
+
+    # clusters: union-find over all pairs within distance k
+    parent = {meta_id: meta_id for meta_id in hashes}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for meta_id, value in hashes.items():
+        for _, other in tree.search(value, args.k):
+            ra, rb = find(meta_id), find(other)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+    groups = defaultdict(list)
+    for meta_id in hashes:
+        groups[find(meta_id)].append(meta_id)
+    dupes = sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: (-len(g), g[0]))
+    print(json.dumps(dupes, indent=2))
+    print(f"{len(dupes)} duplicate clusters covering {sum(len(g) for g in dupes)} metas", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
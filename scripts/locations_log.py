@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Append-only log for crowdsourced location links.
+
+Contributions (userscript and issue workflow) append one JSON line per
+link to data/locations.log.jsonl instead of rewriting locations.json:
+
+    {"panoid": "...", "metas": ["meta_..."], "lat": 1.0, "lng": 2.0, ...}
+
+Readers overlay the uncompacted tail onto locations.json at load time;
+this script folds the log into locations.json, deduplicating by panoid
+and merging `metas` lists:
+
+    python scripts/locations_log.py compact [--min-entries N]
+    python scripts/locations_log.py status
+
+The "Compact Locations Log" workflow runs compact daily once the log
+has enough entries, keeping it well below the 1 MB the GitHub contents
+API returns inline.
+
+Merge rules (same as applyLocationLogEntry() in the userscript):
+- meta ids are unioned, keeping first-seen order
+- non-empty location fields in a log entry overwrite the stored ones
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from atomic_write import write_json_atomic
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+LOCATIONS_FILE_PATH = DATA_DIR / "locations.json"
+LOG_FILE_PATH = DATA_DIR / "locations.log.jsonl"
+
+LOCATION_FIELDS = ["lat", "lng", "country", "nominatimCountry", "region", "city", "road"]
+
+
+def read_log(path: Path = LOG_FILE_PATH, end: int = None, malformed: list = None) -> list:
+    """Parse log entries, optionally only the first `end` bytes.
+
+    Lines that aren't JSON are skipped with a warning, and collected in
+    `malformed` if given.
+    """
+    if not path.exists():
+        return []
+    with open(path, 'rb') as f:
+        raw = f.read() if end is None else f.read(end)
+    entries = []
+    for lineno, line in enumerate(raw.decode('utf-8').splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Warning: skipping malformed log line {lineno}", file=sys.stderr)
+            if malformed is not None:
+                malformed.append(line)
+            continue
+        if isinstance(entry, dict) and entry.get('panoid'):
+            entries.append(entry)
+    return entries
+
+
+def apply_entry(locations: dict, entry: dict):
+    """Fold a single log entry into the location map in place."""
+    panoid = entry['panoid']
+    target = locations.get(panoid)
+    if not isinstance(target, dict):
+        target = {"metas": list(target) if isinstance(target, list) else []}
+        locations[panoid] = target
+    metas = target.setdefault('metas', [])
+    for meta_id in entry.get('metas', []):
+        if meta_id and meta_id not in metas:
+            metas.append(meta_id)
+    for field in LOCATION_FIELDS:
+        value = entry.get(field)
+        if value is not None and value != '':
+            target[field] = value
+
+
+def load_locations(base_path: Path = LOCATIONS_FILE_PATH, log_path: Path = LOG_FILE_PATH) -> dict:
+    """Load locations.json with the uncompacted log tail overlaid."""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        locations = json.load(f)
+    for entry in read_log(log_path):
+        apply_entry(locations, entry)
+    return locations
+
+
+def compact(min_entries: int = 1) -> int:
+    """Fold the log into locations.json; returns the number of entries folded."""
+    if not LOG_FILE_PATH.exists():
+        return 0
+    # Snapshot the log first: anything appended while we compact stays in the log.
+    # Only complete lines are folded, a line still being written stays as well.
+    with open(LOG_FILE_PATH, 'rb') as f:
+        snapshot = f.read().rfind(b"\n") + 1
+    malformed = []
+    entries = read_log(LOG_FILE_PATH, snapshot, malformed)
+    if len(entries) < min_entries:
+        return 0
+
+    with open(LOCATIONS_FILE_PATH, 'r', encoding='utf-8') as f:
+        locations = json.load(f)
+    for entry in entries:
+        apply_entry(locations, entry)
+    write_json_atomic(LOCATIONS_FILE_PATH, locations)
+
+    with open(LOG_FILE_PATH, 'rb') as f:
+        f.seek(snapshot)
+        tail = f.read()
+    # Never drop a link: malformed lines go back into the log for manual repair
+    if malformed:
+        print(f"Warning: keeping {len(malformed)} malformed line(s) in {LOG_FILE_PATH.name}", file=sys.stderr)
+        tail = "".join(line + "\n" for line in malformed).encode('utf-8') + tail
+    tmp_path = LOG_FILE_PATH.with_name(LOG_FILE_PATH.name + ".tmp")
+    tmp_path.write_bytes(tail)
+    os.replace(tmp_path, LOG_FILE_PATH)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact or inspect the locations log.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact_cmd = sub.add_parser("compact", help="fold the log into locations.json")
+    compact_cmd.add_argument("--min-entries", type=int, default=1,
+                             help="only compact once the log has at least this many entries")
+    sub.add_parser("status", help="show how many entries are waiting to be compacted")
+    args = parser.parse_args()
+
+    if args.command == "status":
+        entries = read_log()
+        panoids = {entry['panoid'] for entry in entries}
+        print(f"{len(entries)} log entries for {len(panoids)} panoids waiting to be compacted")
+        return
+
+    folded = compact(args.min_entries)
+    if folded:
+        print(f"Folded {folded} log entries into {LOCATIONS_FILE_PATH.name}")
+    else:
+        print("Nothing to compact.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Compiled, memory-mapped, read-only meta store.
+
+Build it from plonkit_data.json and metas.json, then look up single metas
+by id without loading the whole corpus:
+
+    python scripts/meta_store.py build
+    python scripts/meta_store.py get meta_1769520862728_7q7ph
+
+File layout (all integers little-endian):
+- header:  magic "BMSTORE1", version u32, count u32, key width u32,
+           table offset u64, sha256 of the source files (32 bytes),
+           size i64 and mtime_ns i64 of each source file (-1 if missing)
+- table:   `count` fixed-width slots sorted by id; each slot is the id
+           (NUL-padded to key width) followed by its record offset u64
+- records: u32 length followed by compact UTF-8 JSON of the meta
+
+Opening reads only the header, so it takes constant time regardless of
+corpus size; lookups binary-search the table and decode a single record.
+`get` notices changed sources by their size and mtime; `build` compares
+the checksum, so touching a file without changing it rebuilds nothing.
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+PLONKIT_FILE_PATH = DATA_DIR / "plonkit_data.json"
+USER_METAS_FILE_PATH = DATA_DIR / "metas.json"
+STORE_FILE_PATH = DATA_DIR / "metas.store"
+SOURCE_PATHS = (PLONKIT_FILE_PATH, USER_METAS_FILE_PATH)
+
+MAGIC = b"BMSTORE1"
+VERSION = 2
+HEADER = struct.Struct("<8sIIIQ32s" + "qq" * len(SOURCE_PATHS))
+STATS_OFFSET = struct.calcsize("<8sIIIQ32s")
+OFFSET = struct.Struct("<Q")
+LENGTH = struct.Struct("<I")
+
+
+def sources_checksum(paths=SOURCE_PATHS) -> bytes:
+    """sha256 over the raw bytes of every source file that exists."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.name.encode('utf-8') + b"\0")
+        if path.exists():
+            h.update(path.read_bytes())
+        h.update(b"\0")
+    return h.digest()
+
+
+def sources_stats(paths=SOURCE_PATHS) -> tuple:
+    """(size, mtime_ns) of every source file, flattened; -1, -1 if missing."""
+    stats = []
+    for path in paths:
+        try:
+            st = path.stat()
+            stats += [st.st_size, st.st_mtime_ns]
+        except FileNotFoundError:
+            stats += [-1, -1]
+    return tuple(stats)
+
+
+def load_source_metas() -> dict:
+    """Map meta id -> meta for Plonk It metas; user metas override on id clash."""
+    metas = {}
+    with open(PLONKIT_FILE_PATH, 'r', encoding='utf-8') as f:
+        for country_data in json.load(f):
+            for meta in country_data.get('metas', []):
+                metas[meta['id']] = meta
+    if USER_METAS_FILE_PATH.exists():
+        with open(USER_METAS_FILE_PATH, 'r', encoding='utf-8') as f:
+            for meta in json.load(f):
+                if meta.get('id'):
+                    metas[meta['id']] = meta
+    return metas
+
+
+def build_store(metas: dict, checksum: bytes, stats: tuple, path: Path = STORE_FILE_PATH) -> int:
+    """Write `metas` to a compiled store at `path`; returns the meta count."""
+    ids = sorted(metas)
+    keys = [meta_id.encode('utf-8') for meta_id in ids]
+    key_width = max((len(k) for k in keys), default=0)
+    slot_size = key_width + OFFSET.size
+    table_offset = HEADER.size
+    record_offset = table_offset + slot_size * len(ids)
+
+    table = bytearray()
+    records = bytearray()
+    for key, meta_id in zip(keys, ids):
+        payload = json.dumps(metas[meta_id], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        table += key.ljust(key_width, b"\0") + OFFSET.pack(record_offset + len(records))
+        records += LENGTH.pack(len(payload)) + payload
+
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(ids), key_width, table_offset, checksum, *stats))
+        f.write(table)
+        f.write(records)
+    tmp_path.replace(path)
+    return len(ids)
+
+
+class MetaStore:
+    """Read-only view over a compiled meta store."""
+
+    def __init__(self, path: Path = STORE_FILE_PATH):
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty, not a meta store")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is truncated, not a meta store")
+        magic, version, count, key_width, table_offset, checksum, *stats = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} meta store")
+        if table_offset + count * (key_width + OFFSET.size) > len(self._mm):
+            self.close()
+            raise ValueError(f"{path} is truncated, its id table is incomplete")
+        self.count = count
+        self.checksum = checksum
+        self.stats = tuple(stats)
+        self._key_width = key_width
+        self._slot_size = key_width + OFFSET.size
+        self._table_offset = table_offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, meta_id):
+        return self._find(meta_id) is not None
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def is_stale(self, paths=SOURCE_PATHS) -> bool:
+        """True if the source files changed since the store was built (reads them all)."""
+        return self.checksum != sources_checksum(paths)
+
+    def is_modified(self, paths=SOURCE_PATHS) -> bool:
+        """Cheap is_stale(): True if a source file's size or mtime changed."""
+        return self.stats != sources_stats(paths)
+
+    def _key_at(self, index: int) -> bytes:
+        start = self._table_offset + index * self._slot_size
+        return self._mm[start:start + self._key_width].rstrip(b"\0")
+
+    def _find(self, meta_id: str):
+        key = meta_id.encode('utf-8')
+        if len(key) > self._key_width:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            return lo
+        return None
+
+    def get(self, meta_id: str, default=None):
+        """Return the meta with `meta_id`, decoding only its record."""
+        index = self._find(meta_id)
+        if index is None:
+            return default
+        slot = self._table_offset + index * self._slot_size + self._key_width
+        (offset,) = OFFSET.unpack_from(self._mm, slot)
+        (length,) = LENGTH.unpack_from(self._mm, offset)
+        start = offset + LENGTH.size
+        return json.loads(self._mm[start:start + length].decode('utf-8'))
+
+    def ids(self):
+        """Iterate over all meta ids in sorted order."""
+        for index in range(self.count):
+            yield self._key_at(index).decode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the compiled meta store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="compile plonkit_data.json and metas.json")
+    build.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    get = sub.add_parser("get", help="print metas by id")
+    get.add_argument("ids", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        # Stats first: a source changing meanwhile then looks modified to 'get'
+        stats = sources_stats()
+        checksum = sources_checksum()
+        if STORE_FILE_PATH.exists() and not args.force:
+            try:
+                with MetaStore() as store:
+                    up_to_date = store.checksum == checksum
+                    refresh = up_to_date and store.stats != stats
+                    count = len(store)
+                if refresh:
+                    # Same content, new mtimes: record them so 'get' stops warning
+                    with open(STORE_FILE_PATH, 'r+b') as f:
+                        f.seek(STATS_OFFSET)
+                        f.write(struct.pack("<" + "qq" * len(SOURCE_PATHS), *stats))
+                if up_to_date:
+                    print(f"{STORE_FILE_PATH.name} is up to date ({count} metas).")
+                    return
+            except (ValueError, struct.error) as e:
+                # A broken or outdated store is just stale: rebuild it
+                print(f"Rebuilding: {e}")
+        print("Loading plonkit_data.json and metas.json...")
+        count = build_store(load_source_metas(), checksum, stats)
+        print(f"Wrote {count} metas to {STORE_FILE_PATH.name}")
+        print("Done!")
+        return
+
+    try:
+        store = MetaStore()
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Cannot open {STORE_FILE_PATH.name} ({e}), run 'build' first.", file=sys.stderr)
+        sys.exit(1)
+    with store:
+        if store.is_modified():
+            print(f"Warning: {STORE_FILE_PATH.name} is stale, run 'build' again.", file=sys.stderr)
+        missing = 0
+        for meta_id in args.ids:
+            meta = store.get(meta_id)
+            if meta is None:
+                print(f"Not found: {meta_id}", file=sys.stderr)
+                missing += 1
+            else:
+                print(json.dumps(meta, indent=2, ensure_ascii=False))
+        sys.exit(1 if missing else 0)
+
+
+if __name__ == "__main__":
+    main()
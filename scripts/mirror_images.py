@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Mirror meta images from plonkit_data.json as small WebP thumbnails.
+
+Downloads every `imageUrl` through a bounded thread pool (one keep-alive
+connection per worker and host), resizes it to a WebP thumbnail named
+after the sha256 of the original bytes plus the thumbnail size and
+quality, and sets `localImageUrl` on the meta. A manifest remembers ETag/Last-Modified per URL so later runs send
+conditional requests and skip unchanged images.
+
+    python scripts/mirror_images.py
+    python scripts/mirror_images.py --base-url http://127.0.0.1:8000 --workers 4
+
+--base-url replaces scheme and host of every imageUrl, e.g. to test
+against a local HTTP server. Requires Pillow (pip install Pillow).
+"""
+
+import argparse
+import hashlib
+import http.client
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from atomic_write import write_json_atomic
+from plonkit_data import PlonkitData
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+JSON_FILE_PATH = DATA_DIR / "plonkit_data.json"
+THUMBS_DIR = DATA_DIR / "thumbs"
+MANIFEST_FILE_NAME = "manifest.json"
+
+USER_AGENT = "BetterMetas-ImageMirror/1.0"
+TIMEOUT = 30
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections, one per worker thread and host."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _connection(self, scheme: str, netloc: str, fresh: bool = False):
+        conns = self._local.__dict__.setdefault('conns', {})
+        key = (scheme, netloc)
+        if fresh and key in conns:
+            conns.pop(key).close()
+        if key not in conns:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conns[key] = cls(netloc, timeout=TIMEOUT)
+        return conns[key]
+
+    def get(self, url: str, headers: dict):
+        """GET `url`; returns (status, response headers, body). Retries once on a stale connection."""
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = dict(headers, **{"User-Agent": USER_AGENT})
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc, fresh=attempt > 0)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                return resp.status, resp.headers, body
+            except (http.client.HTTPException, OSError):
+                if attempt:
+                    raise
+
+
+def source_url(image_url: str, base_url: str = None) -> str:
+    """imageUrl with scheme and host replaced by `base_url` if given."""
+    if not base_url:
+        return image_url
+    parts = urlsplit(image_url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return base_url.rstrip('/') + path
+
+
+def make_thumbnail(data: bytes, max_size: int, quality: int) -> bytes:
+    """Resize image bytes to fit `max_size` and encode as WebP."""
+    with Image.open(io.BytesIO(data)) as img:
+        img.thumbnail((max_size, max_size))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        out = io.BytesIO()
+        img.save(out, "WEBP", quality=quality, method=4)
+        return out.getvalue()
+
+
+def thumb_name(digest: str, size: int, quality: int) -> str:
+    """Thumbnail file name; differs per source bytes and per thumbnail settings."""
+    return f"{digest[:16]}_{size}q{quality}.webp"
+
+
+def write_thumb(path: Path, data: bytes):
+    """Write through a unique temp file; threads with identical images may race here."""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_name, path)
+    except OSError:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def mirror_one(pool: ConnectionPool, image_url: str, cached: dict, args) -> tuple:
+    """Fetch and thumbnail one image; returns (image_url, manifest entry or None, status)."""
+    headers = {}
+    # Conditional requests only help if the cached thumbnail matches the current settings
+    if cached and cached.get('thumb') == thumb_name(cached['sha256'], args.size, args.quality) \
+            and (THUMBS_DIR / cached['thumb']).exists():
+        if cached.get('etag'):
+            headers["If-None-Match"] = cached['etag']
+        if cached.get('lastModified'):
+            headers["If-Modified-Since"] = cached['lastModified']
+    try:
+        status, resp_headers, body = pool.get(source_url(image_url, args.base_url), headers)
+    except (http.client.HTTPException, OSError) as e:
+        return image_url, cached, f"error: {e}"
+
+    if status == 304:
+        return image_url, cached, "unchanged"
+    if status != 200:
+        return image_url, cached, f"HTTP {status}"
+
+    digest = hashlib.sha256(body).hexdigest()
+    name = thumb_name(digest, args.size, args.quality)
+    thumb_path = THUMBS_DIR / name
+    if not thumb_path.exists():
+        try:
+            thumb = make_thumbnail(body, args.size, args.quality)
+        except Exception as e:  # Pillow raises a variety of errors on broken images
+            return image_url, cached, f"bad image: {e}"
+        try:
+            write_thumb(thumb_path, thumb)
+        except OSError as e:
+            return image_url, cached, f"error: {e}"
+
+    entry = {
+        "sha256": digest,
+        "thumb": name,
+        "etag": resp_headers.get("ETag"),
+        "lastModified": resp_headers.get("Last-Modified"),
+    }
+    return image_url, entry, "downloaded"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror meta images as WebP thumbnails.")
+    parser.add_argument("--base-url", help="replace scheme and host of every imageUrl")
+    parser.add_argument("--workers", type=int, default=8, help="download threads (default: 8)")
+    parser.add_argument("--size", type=int, default=200, help="thumbnail bounding box in px (default: 200)")
+    parser.add_argument("--quality", type=int, default=75, help="WebP quality (default: 75)")
+    parser.add_argument("--url-prefix", default="data/thumbs",
+                        help="prefix for localImageUrl (default: data/thumbs)")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("Pillow is required for thumbnails: pip install Pillow", file=sys.stderr)
+        sys.exit(1)
+
+    print("Loading plonkit_data.json...")
+    data = PlonkitData(JSON_FILE_PATH)
+
+    THUMBS_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = THUMBS_DIR / MANIFEST_FILE_NAME
+    manifest = {}
+    if manifest_path.exists():
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+
+    urls = sorted({meta['imageUrl'] for country_data in data.countries
+                   for meta in country_data.get('metas', []) if meta.get('imageUrl')})
+    print(f"Mirroring {len(urls)} images with {args.workers} workers...")
+
+    pool = ConnectionPool()
+    stats = {}
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(mirror_one, pool, url, manifest.get(url), args) for url in urls]
+        for future in futures:
+            url, entry, status = future.result()
+            key = status.split(':')[0]
+            stats[key] = stats.get(key, 0) + 1
+            if entry is not None:
+                manifest[url] = entry
+            if key not in ("downloaded", "unchanged"):
+                print(f"  {status:20} | {url}")
+
+    write_json_atomic(manifest_path, manifest)
+
+    prefix = args.url_prefix.rstrip('/')
+    for country_data in data.countries:
+        for meta in country_data.get('metas', []):
+            entry = manifest.get(meta.get('imageUrl'))
+            if entry:
+                data.set(meta, 'localImageUrl', f"{prefix}/{entry['thumb']}")
+
+    print(f"\n{'='*50}")
+    for status, num in sorted(stats.items(), key=lambda x: -x[1]):
+        print(f"  {status:15}: {num:5} images")
+    print(f"{'='*50}")
+
+    if data.dirty:
+        print(f"Saving {data.changed_metas} updated metas to plonkit_data.json...")
+        data.save()
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()
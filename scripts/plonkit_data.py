@@ -0,0 +1,112 @@
+"""
+Change-detecting, atomic writer for plonkit_data.json.
+
+The generators load the file through PlonkitData and assign fields with
+set(), which only marks a country block dirty if the value actually
+changes. save() then:
+
+- does nothing at all (no write, mtime untouched) if no block is dirty
+- otherwise re-serializes only the dirty country blocks and splices them
+  into the original text, so clean blocks keep their bytes verbatim
+- writes through a temp file and rename, so an interrupted run never
+  leaves a truncated file behind
+
+    data = PlonkitData()
+    for country_data in data.countries:
+        for meta in country_data.get('metas', []):
+            data.set(meta, 'scope', determine_scope(...))
+    data.save()
+"""
+
+import json
+from pathlib import Path
+
+from atomic_write import write_text_atomic
+
+JSON_FILE_PATH = Path(__file__).parent.parent / "data" / "plonkit_data.json"
+
+_MISSING = object()
+
+
+def _block_spans(text: str) -> list:
+    """(start, end) of every top-level element of a JSON array, or None if `text` isn't one."""
+    decoder = json.JSONDecoder()
+    ws = " \t\r\n"
+    pos = len(text) - len(text.lstrip(ws))
+    if not text.startswith("[", pos):
+        return None
+    pos += 1
+    spans = []
+    while True:
+        while pos < len(text) and text[pos] in ws:
+            pos += 1
+        if text.startswith("]", pos) and not spans:
+            return spans
+        _, end = decoder.raw_decode(text, pos)
+        spans.append((pos, end))
+        pos = end
+        while pos < len(text) and text[pos] in ws:
+            pos += 1
+        if text.startswith("]", pos):
+            return spans
+        if not text.startswith(",", pos):
+            return None
+        pos += 1
+
+
+class PlonkitData:
+    """Country blocks of plonkit_data.json with per-block dirty tracking."""
+
+    def __init__(self, path: Path = JSON_FILE_PATH):
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f:
+            self._text = f.read()
+        self.countries = json.loads(self._text)
+        self._spans = _block_spans(self._text)
+        self._block_of = {id(meta): i for i, country_data in enumerate(self.countries)
+                          for meta in country_data.get('metas', [])}
+        self.dirty = set()  # indices of changed country blocks
+        self._changed = set()  # id() of changed metas
+
+    def set(self, meta: dict, field: str, value) -> bool:
+        """Assign meta[field]; returns True (and marks the block dirty) if it changed."""
+        if meta.get(field, _MISSING) == value:
+            return False
+        meta[field] = value
+        self.dirty.add(self._block_of[id(meta)])
+        self._changed.add(id(meta))
+        return True
+
+    @property
+    def changed_metas(self) -> int:
+        return len(self._changed)
+
+    def serialize(self) -> str:
+        """File text with only the dirty blocks re-serialized."""
+        if self._spans is None or len(self._spans) != len(self.countries):
+            return json.dumps(self.countries, indent=2, ensure_ascii=False)
+        parts = []
+        pos = 0
+        for i in sorted(self.dirty):
+            start, end = self._spans[i]
+            # Indent continuation lines like the block's opening line
+            indent = self._text[self._text.rfind("\n", 0, start) + 1:start]
+            if indent.strip():
+                indent = "  "
+            block = json.dumps(self.countries[i], indent=2, ensure_ascii=False)
+            parts.append(self._text[pos:start])
+            parts.append(block.replace("\n", "\n" + indent))
+            pos = end
+        parts.append(self._text[pos:])
+        return "".join(parts)
+
+    def save(self) -> bool:
+        """Write the file if anything changed; returns whether it was written."""
+        if not self.dirty:
+            return False
+        self._text = self.serialize()
+        write_text_atomic(self.path, self._text)
+        self._spans = _block_spans(self._text)
+        self.dirty.clear()
+        self._changed.clear()
+        return True
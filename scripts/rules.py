@@ -0,0 +1,102 @@
+"""
+Ordered first-match rule lists and per-country rule plans.
+
+The scope and title generators are written as ordered lists of rules; the
+first rule returning a value wins. Each rule declares the literal
+substrings (lowercase) at least one of which must appear in the text for
+the rule to be able to match, or None if it has no such prerequisite.
+
+A rule plan (compiled by compile_rule_plans.py) keeps, per country, only
+the rules that ever fired there plus every rule without prerequisites.
+A pruned rule is put back (in its original position) whenever one of its
+literals occurs in the text, so the result is always the same as
+evaluating every rule.
+"""
+
+import hashlib
+import inspect
+import json
+import re
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Tuple
+
+RULE_PLANS_FILE_PATH = Path(__file__).parent.parent / "data" / "rule_plans.json"
+
+
+class Rule(NamedTuple):
+    name: str
+    literals: Optional[Tuple[str, ...]]
+    fn: Callable
+
+
+def _rule_source(fn: Callable) -> str:
+    """Source of a rule function plus the module-level functions and constants it uses."""
+    parts = [inspect.getsource(fn)]
+    for name in fn.__code__.co_names:
+        value = fn.__globals__.get(name)
+        if inspect.isfunction(value):
+            parts.append(inspect.getsource(value))
+        elif value is not None and not inspect.ismodule(value) and not inspect.isclass(value):
+            parts.append(f"{name} = {value!r}")
+    return "\n".join(parts)
+
+
+def rules_fingerprint(rules: list) -> str:
+    """Hash of rule names, prerequisites and bodies; a plan for other rules is ignored.
+
+    Hashing the source means editing a rule body without updating its
+    literals still invalidates the plans instead of pruning a rule that
+    can now match.
+    """
+    h = hashlib.sha1()
+    for rule in rules:
+        h.update(rule.name.encode('utf-8'))
+        h.update(repr(rule.literals).encode('utf-8'))
+        h.update(_rule_source(rule.fn).encode('utf-8'))
+    return h.hexdigest()
+
+
+class RulePlan:
+    """Pruned rule list for one country with a literal-based safety check."""
+
+    def __init__(self, rules: list, fired: set):
+        self.all_rules = list(rules)
+        self.rules = [r for r in rules if r.literals is None or r.name in fired]
+        self._kept = {r.name for r in self.rules}
+        self._pruned_rules = [r for r in rules if r.name not in self._kept]
+        pruned_literals = sorted({lit for r in self._pruned_rules for lit in r.literals},
+                                 key=lambda lit: (-len(lit), lit))
+        self._pruned = re.compile("|".join(map(re.escape, pruned_literals))) if pruned_literals else None
+
+    def needs_full(self, haystack: str) -> bool:
+        """True if a pruned rule could still match this text."""
+        return self._pruned is not None and self._pruned.search(haystack) is not None
+
+    def active_rules(self, haystack: str) -> list:
+        """Kept rules plus any pruned rule whose literals occur, in original order."""
+        if not self.needs_full(haystack):
+            return self.rules
+        revived = {r.name for r in self._pruned_rules if any(lit in haystack for lit in r.literals)}
+        return [r for r in self.all_rules if r.name in self._kept or r.name in revived]
+
+
+def run_rules(rules: list, args: tuple, default, plan: RulePlan = None, haystack: str = ""):
+    """Evaluate rules in order; returns (result, name of the rule that fired)."""
+    active = rules if plan is None else plan.active_rules(haystack)
+    for rule in active:
+        result = rule.fn(*args)
+        if result is not None:
+            return result, rule.name
+    return default, None
+
+
+def load_rule_plans(kind: str, rules: list, path: Path = RULE_PLANS_FILE_PATH) -> dict:
+    """Map country -> RulePlan for `kind`, or {} if missing or compiled for other rules."""
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        section = json.load(f).get(kind, {})
+    if section.get('fingerprint') != rules_fingerprint(rules):
+        print(f"Rule plans for '{kind}' are stale, using the full rule set.")
+        return {}
+    return {country: RulePlan(rules, set(fired)) for country, fired in section.get('countries', {}).items()}
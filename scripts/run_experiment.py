@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Compare rule-set variants for scopes, titles and tags in one pass.
+
+Each variant is a Python file that may define SCOPE_RULES, TITLE_RULES
+and/or TAG_PATTERNS (anything it leaves out comes from the current
+generators), e.g.:
+
+    from generate_scopes import SCOPE_RULES as _BASE
+    SCOPE_RULES = [r for r in _BASE if r.name != "named_roads"]
+
+The corpus is loaded and normalized once (lowercased description/title,
+combined tag text), split into chunks and evaluated against the current
+rules and every variant across a process pool. Nothing is written to
+plonkit_data.json.
+
+    python scripts/run_experiment.py my_variant.py other_variant.py
+    python scripts/run_experiment.py my_variant.py --diff-out diff.csv
+
+Prints per-variant scope/tag distributions and the metas whose scope,
+title or tags differ from the current rules.
+"""
+
+import argparse
+import csv
+import importlib.util
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import generate_scopes
+import generate_tags
+import generate_titles
+from rules import run_rules
+
+JSON_FILE_PATH = generate_scopes.JSON_FILE_PATH
+BASELINE_NAME = "current"
+CHUNK_SIZE = 250
+
+# Rule sets per variant, set in each worker by _init_worker
+_VARIANTS = []
+
+
+def load_variant(path: Path) -> tuple:
+    """(name, scope rules, title rules, tag patterns) from a variant file."""
+    spec = importlib.util.spec_from_file_location(f"variant_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return (
+        getattr(module, "NAME", path.stem),
+        getattr(module, "SCOPE_RULES", generate_scopes.SCOPE_RULES),
+        getattr(module, "TITLE_RULES", generate_titles.TITLE_RULES),
+        getattr(module, "TAG_PATTERNS", generate_tags.TAG_PATTERNS),
+    )
+
+
+def baseline_variant() -> tuple:
+    return (BASELINE_NAME, generate_scopes.SCOPE_RULES, generate_titles.TITLE_RULES, generate_tags.TAG_PATTERNS)
+
+
+def _init_worker(variant_paths: list):
+    global _VARIANTS
+    _VARIANTS = [baseline_variant()] + [load_variant(Path(p)) for p in variant_paths]
+
+
+def normalize_corpus(data: list) -> list:
+    """One record per meta with everything the rules need, lowercased once."""
+    records = []
+    for country_data in data:
+        country = country_data.get('country', 'Unknown')
+        for meta in country_data.get('metas', []):
+            title = meta.get('title', '')
+            desc = meta.get('description', '')
+            note = meta.get('note', '')
+            all_text, newlines = generate_tags.normalize_text(title, desc, note)
+            records.append({
+                "id": meta['id'],
+                "country": country,
+                "section": meta.get('section', ''),
+                "title": title,
+                "desc": desc,
+                "d": desc.lower(),
+                "t": title.lower(),
+                "all_text": all_text,
+                "newlines": newlines,
+            })
+    return records
+
+
+def evaluate_chunk(records: list) -> list:
+    """[(meta id, [(scope, title, tags) per variant])] for a chunk of records."""
+    results = []
+    for r in records:
+        # Variants usually share most rule sets; evaluate each distinct set once
+        scopes, titles, tag_sets = {}, {}, {}
+        outcomes = []
+        for _, scope_rules, title_rules, tag_patterns in _VARIANTS:
+            if id(scope_rules) not in scopes:
+                scopes[id(scope_rules)] = run_rules(
+                    scope_rules, (r["title"], r["desc"], r["section"], r["d"], r["t"]), "")[0]
+            if id(title_rules) not in titles:
+                titles[id(title_rules)] = run_rules(
+                    title_rules, (r["desc"], r["d"], r["country"]), "Regional Feature")[0]
+            if id(tag_patterns) not in tag_sets:
+                tag_sets[id(tag_patterns)] = tuple(
+                    generate_tags.tags_for_text(r["all_text"], r["newlines"], tag_patterns))
+            outcomes.append((scopes[id(scope_rules)], titles[id(title_rules)], tag_sets[id(tag_patterns)]))
+        results.append((r["id"], outcomes))
+    return results
+
+
+def _format(value) -> str:
+    return ", ".join(value) if isinstance(value, tuple) else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rule-set variants in one pass over the corpus.")
+    parser.add_argument("variants", nargs="+", type=Path, help="variant files")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--diff-out", type=Path, help="write the per-meta diff table as CSV")
+    parser.add_argument("--show", type=int, default=20, help="diff rows to print per variant (default: 20)")
+    args = parser.parse_args()
+
+    # Fail early on broken variant files, before spawning workers
+    names = [BASELINE_NAME] + [load_variant(path)[0] for path in args.variants]
+
+    print("Loading plonkit_data.json...")
+    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
+        records = normalize_corpus(json.load(f))
+
+    chunks = [records[i:i + CHUNK_SIZE] for i in range(0, len(records), CHUNK_SIZE)]
+    workers = args.workers or os.cpu_count() or 1
+    print(f"Evaluating {len(names)} rule sets on {len(records)} metas with {workers} workers...")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=([str(p) for p in args.variants],)) as executor:
+        for chunk_results in executor.map(evaluate_chunk, chunks):
+            results.extend(chunk_results)
+
+    scope_stats = [Counter() for _ in names]
+    tag_stats = [Counter() for _ in names]
+    diffs = []  # (variant, meta id, field, current, variant value)
+    for meta_id, outcomes in results:
+        for i, (scope, title, tags) in enumerate(outcomes):
+            scope_stats[i][scope] += 1
+            tag_stats[i].update(tags or ("(none)",))
+            if i == 0:
+                continue
+            for field, base, value in zip(("scope", "title", "tags"), outcomes[0], (scope, title, tags)):
+                if base != value:
+                    diffs.append((names[i], meta_id, field, _format(base), _format(value)))
+
+    for label, stats in (("SCOPE", scope_stats), ("TAG", tag_stats)):
+        keys = sorted(set().union(*stats), key=lambda k: -stats[0][k])
+        print(f"\n{label} DISTRIBUTION:")
+        print("  " + f"{'':14}" + "".join(f"{name[:12]:>13}" for name in names))
+        for key in keys:
+            print("  " + f"{(key or '(empty)')[:14]:14}" + "".join(f"{s[key]:13}" for s in stats))
+
+    print("\nDIFFERENCES FROM CURRENT RULES:")
+    for name in names[1:]:
+        rows = [d for d in diffs if d[0] == name]
+        changed = len({d[1] for d in rows})
+        print(f"\n[{name}] {changed} metas changed")
+        for _, meta_id, field, base, value in rows[:args.show]:
+            print(f"  {meta_id:28} {field:6} {base[:30]:30} -> {value[:30]}")
+
+    if args.diff_out:
+        with open(args.diff_out, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["variant", "meta_id", "field", BASELINE_NAME, "value"])
+            writer.writerows(diffs)
+        print(f"\nWrote {len(diffs)} diff rows to {args.diff_out}")
+
+    print("Done!")
+
+
+if __name__ == "__main__":
+    main()